@@ -1,52 +1,68 @@
+import time
+LAUNCH_TIME = time.perf_counter()  # cold-start reference, taken before the other imports
+
 import tkinter as tk
-from tkinter import ttk, colorchooser, filedialog, messagebox
+from tkinter import ttk
 import json
-import tkinter.font as tkFont
 import platform
-import csv
-import time
-import random
-import math
+import os
+
+import font_pool
+import frame_timing
+import glyph_metrics
+import item_index
+import layout_file
+import placement
+import profiling
+import raster_render
+import row_model
+import trials
+import validation
 
 ###################################
 # Global references
 ###################################
+# The widgets are created by create_app(); these stay None until then.
+root = None
+preview_canvas = None
 run_btn = None
 distr_auto_enabled = True  # for auto distribution of leftover items among distractors
 
 # We'll store the ID of any pending 'after' call for debounce
 debounce_id = None
 DEBOUNCE_DELAY_MS = 300
+# True while set_configuration() loads a configuration: updates are held back
+# and it refreshes the preview and validation once at the end
+updates_held = False
+# Per-trial "block" of an imported configuration (see trials.expand_block),
+# run instead of "Number of trials" repeats until it is cleared
+loaded_block = None
+
+# Measured glyph sizes, shared by every display in this process. Set
+# SEARCHTASK_GLYPH_CACHE to a file path to keep them between sessions.
+GLYPH_CACHE_FILE = os.environ.get("SEARCHTASK_GLYPH_CACHE")
+glyph_metrics_cache = None
+
+# Response rows are written by a background thread and flushed to disk
+# every LOG_FLUSH_ROWS rows or LOG_FLUSH_INTERVAL_S seconds.
+# (response_log's defaults; it and session_store, with csv, threading and
+# sqlite3, are only imported when a session starts)
+LOG_FLUSH_ROWS = 10
+LOG_FLUSH_INTERVAL_S = 1.0
+
+# Blank screen between trials of a block
+INTER_TRIAL_INTERVAL_MS = 500
+
+# Opt-in profiling (SEARCHTASK_PROFILE, see profiling.py): building the
+# setup UI and preview refreshes; each session gets its own profile.
+ui_profile = profiling.SessionProfile(profiling.profile_mode(), origin=LAUNCH_TIME)
 
-root = tk.Tk()
-root.title("RP-CNBI Search Task")
-# reduce height by ~10%; originally 900 -> 810
-root.geometry("1400x810")
-
-main_container = ttk.Frame(root)
-main_container.grid(row=0, column=0, sticky="nsew")
-
-root.rowconfigure(0, weight=1)
-root.columnconfigure(0, weight=1)
-
-canvas = tk.Canvas(main_container)
-canvas.grid(row=0, column=0, sticky="nsew")
-
-scrollbar = ttk.Scrollbar(main_container, orient="vertical", command=canvas.yview)
-scrollbar.grid(row=0, column=1, sticky="ns")
-
-canvas.configure(yscrollcommand=scrollbar.set)
-main_container.rowconfigure(0, weight=1)
-main_container.columnconfigure(0, weight=1)
-
-content_frame = ttk.Frame(canvas)
-canvas.create_window((0, 0), window=content_frame, anchor="nw")
-
+###################################
+# Main window
+###################################
 def on_configure(event):
     canvas.config(scrollregion=canvas.bbox("all"))
 
-content_frame.bind("<Configure>", on_configure)
-
 def _on_mousewheel(event):
     # Adjust for different platforms
     if platform.system() == 'Windows':
@@ -54,7 +70,34 @@ def _on_mousewheel(event):
     else:
         canvas.yview_scroll(int(-1*event.delta), "units")
 
-content_frame.bind_all("<MouseWheel>", _on_mousewheel)
+def build_window():
+    global root, canvas, content_frame
+    root = tk.Tk()
+    root.title("RP-CNBI Search Task")
+    # reduce height by ~10%; originally 900 -> 810
+    root.geometry("1400x810")
+
+    main_container = ttk.Frame(root)
+    main_container.grid(row=0, column=0, sticky="nsew")
+
+    root.rowconfigure(0, weight=1)
+    root.columnconfigure(0, weight=1)
+
+    canvas = tk.Canvas(main_container)
+    canvas.grid(row=0, column=0, sticky="nsew")
+
+    scrollbar = ttk.Scrollbar(main_container, orient="vertical", command=canvas.yview)
+    scrollbar.grid(row=0, column=1, sticky="ns")
+
+    canvas.configure(yscrollcommand=scrollbar.set)
+    main_container.rowconfigure(0, weight=1)
+    main_container.columnconfigure(0, weight=1)
+
+    content_frame = ttk.Frame(canvas)
+    canvas.create_window((0, 0), window=content_frame, anchor="nw")
+
+    content_frame.bind("<Configure>", on_configure)
+    content_frame.bind_all("<MouseWheel>", _on_mousewheel)
 
 ###################################
 # Debounce logic
@@ -65,6 +108,8 @@ def schedule_debounced_update():
     canceling any already-scheduled update if the user keeps typing.
     """
     global debounce_id
+    if updates_held:
+        return
     if debounce_id is not None:
         root.after_cancel(debounce_id)
     debounce_id = root.after(DEBOUNCE_DELAY_MS, do_debounced_update)
@@ -84,46 +129,37 @@ def do_debounced_update():
 ###################################
 # Two columns: left=Settings, right=Preview
 ###################################
-left_frame = ttk.Frame(content_frame, padding=10)
-left_frame.grid(row=0, column=0, sticky="nsew")
+def build_columns():
+    global left_frame, right_frame
+    left_frame = ttk.Frame(content_frame, padding=10)
+    left_frame.grid(row=0, column=0, sticky="nsew")
 
-right_frame = ttk.Frame(content_frame, padding=10)
-right_frame.grid(row=0, column=1, sticky="nsew")
+    right_frame = ttk.Frame(content_frame, padding=10)
+    right_frame.grid(row=0, column=1, sticky="nsew")
 
-content_frame.columnconfigure(0, weight=1)
-content_frame.columnconfigure(1, weight=1)
-content_frame.rowconfigure(0, weight=1)
+    content_frame.columnconfigure(0, weight=1)
+    content_frame.columnconfigure(1, weight=1)
+    content_frame.rowconfigure(0, weight=1)
 
 FONT_OPTIONS = ["Arial", "Times New Roman", "Rockwell", "Verdana", "Helvetica"]
 
-# For Targets
-target_symbol_vars = []
-font_var_vars = []
-text_size_vars = []
-bold_vars = []
-underline_vars = []
-italic_vars = []
-text_color_vars = []
-target_quantity_vars = []
-
-# For Distractors
-distractor_symbol_vars = []
-distractor_font_var_vars = []
-distractor_text_size_vars = []
-distractor_bold_vars = []
-distractor_underline_vars = []
-distractor_italic_vars = []
-distractor_text_color_vars = []
-distractor_quantity_vars = []
+# Targets and Distractors (see row_model.py). The rows hold the values;
+# each row's Tk variables (row.ui) write into them through one trace each.
+target_rows = row_model.RowTable(on_change=lambda: schedule_debounced_update())
+distractor_rows = row_model.RowTable(on_change=lambda: schedule_debounced_update())
 
 screen_size_options = ["same as computer", "3:2, 2880 x 1920", "16:9, 1920 x 1080"]
 refresh_rate_options = ["same as computer", "120Hz", "144Hz"]
+layout_algorithm_options = placement.LAYOUT_ALGORITHMS
+render_mode_options = raster_render.RENDER_MODES
+output_backend_options = ["csv", "sqlite"]  # session_store.OUTPUT_BACKENDS
 
 PREVIEW_DEFAULT_WIDTH = 450
 PREVIEW_DEFAULT_HEIGHT = 300
 
-MAX_TARGET_ROWS = 25
-MAX_DISTRACTOR_ROWS = 25
+# Row widgets are recycled (see RowPanel), so a few hundred rows stay responsive
+MAX_TARGET_ROWS = 200
+MAX_DISTRACTOR_ROWS = 200
 
 ###################################
 # Safe parse from IntVar / StringVar
@@ -146,88 +182,93 @@ def safe_get_int_from_stringvar(var: tk.StringVar, default=0):
 ###################################
 # Build Font & Preview
 ###################################
+# One shared Font per style for the preview and the task display;
+# shared_fonts.stats() reports size, hits, misses and evictions.
+shared_fonts = font_pool.FontPool()
+
 def build_font(family, size, bold, italic, underline):
-    weight = "bold" if bold else "normal"
-    slant = "italic" if italic else "roman"
-    ft = tkFont.Font(family=family, size=size, weight=weight, slant=slant)
-    ft.configure(underline=1 if underline else 0)
-    return ft
+    return shared_fonts.get(family, size, bold, italic, underline)
+
+# What the preview canvas currently shows, in draw order (targets, then
+# distractors): one {"cid", "spec"} per symbol, spec being everything that
+# affects how it is drawn. update_preview_canvas() diffs against this and
+# only touches canvas items whose spec changed.
+preview_items = []
+preview_width = None
+
+def collect_preview_rows():
+    """
+    One pass over the rows: the (sym, family, size, color, bold, italic,
+    underline) of every non-blank target and distractor, plus the summed
+    widths of each section.
+    """
+    t_rows, d_rows = [], []
+    t_width = d_width = 0
+    for row in target_rows:
+        if row.symbol:
+            t_rows.append((row.symbol, row.font, row.size, row.color, row.bold, row.italic, row.underline))
+            t_width += row.size + 10
+    for row in distractor_rows:
+        if row.symbol:
+            d_rows.append((row.symbol, row.font, row.size, row.color, row.bold, row.italic, row.underline))
+            d_width += row.size + 10
+    return t_rows, t_width, d_rows, d_width
 
 def update_preview_canvas():
-    preview_canvas.delete("all")
+    global preview_width
+    start = time.perf_counter()
     y_pos = PREVIEW_DEFAULT_HEIGHT // 2
 
-    # measure total width to size the canvas properly
-    total_width = 0
-    # targets
-    for i in range(len(target_symbol_vars)):
-        sym = target_symbol_vars[i].get()
-        if sym:
-            sz = safe_get_int(text_size_vars[i], 18)
-            total_width += sz + 10
-    # distractors
-    for i in range(len(distractor_symbol_vars)):
-        sym = distractor_symbol_vars[i].get()
-        if sym:
-            sz = safe_get_int(distractor_text_size_vars[i], 18)
-            total_width += sz + 10
-
-    new_width = max(total_width + 20, PREVIEW_DEFAULT_WIDTH)
-    preview_canvas.config(width=new_width)
-    x_mid = new_width // 2
+    t_rows, t_width, d_rows, d_width = collect_preview_rows()
 
-    # measure total width of targets alone
-    t_width = 0
-    for i in range(len(target_symbol_vars)):
-        sym = target_symbol_vars[i].get()
-        if sym:
-            s = safe_get_int(text_size_vars[i], 18)
-            t_width += s + 10
-
-    # measure total width of distractors alone
-    d_width = 0
-    for i in range(len(distractor_symbol_vars)):
-        sym = distractor_symbol_vars[i].get()
-        if sym:
-            s = safe_get_int(distractor_text_size_vars[i], 18)
-            d_width += s + 10
+    # size the canvas to fit everything
+    new_width = max(t_width + d_width + 20, PREVIEW_DEFAULT_WIDTH)
+    if new_width != preview_width:
+        preview_canvas.config(width=new_width)
+        preview_width = new_width
+    x_mid = new_width // 2
 
     x_targets_start = x_mid - 50 - t_width
     if x_targets_start < 10:
         x_targets_start = 10
+
+    # lay out targets then distractors side-by-side
+    specs = []
     x_t = x_targets_start
+    for row in t_rows:
+        specs.append((x_t, y_pos) + row)
+        x_t += row[2] + 10
     x_d = x_mid + 50
-
-    def draw_symbol(x, y, sym, family, sz, color, b, it, un):
-        ft = build_font(family, sz, b, it, un)
-        preview_canvas.create_text(x, y, text=sym, font=ft, fill=color, anchor="n")
-
-    # draw targets (side-by-side)
-    for i in range(len(target_symbol_vars)):
-        sym = target_symbol_vars[i].get()
-        if sym:
-            family = font_var_vars[i].get()
-            sz = safe_get_int(text_size_vars[i], 18)
-            color = text_color_vars[i].get()
-            b = bold_vars[i].get()
-            it = italic_vars[i].get()
-            un = underline_vars[i].get()
-            draw_symbol(x_t, y_pos, sym, family, sz, color, b, it, un)
-            x_t += sz + 10
-
-    # draw distractors (side-by-side)
-    for i in range(len(distractor_symbol_vars)):
-        sym = distractor_symbol_vars[i].get()
-        if sym:
-            family = distractor_font_var_vars[i].get()
-            sz = safe_get_int(distractor_text_size_vars[i], 18)
-            color = distractor_text_color_vars[i].get()
-            b = distractor_bold_vars[i].get()
-            it = distractor_italic_vars[i].get()
-            un = distractor_underline_vars[i].get()
-            draw_symbol(x_d, y_pos, sym, family, sz, color, b, it, un)
-            x_d += sz + 10
-
+    for row in d_rows:
+        specs.append((x_d, y_pos) + row)
+        x_d += row[2] + 10
+
+    # apply only the differences
+    for idx, spec in enumerate(specs):
+        x, y, sym, family, sz, color, b, it, un = spec
+        if idx >= len(preview_items):
+            cid = preview_canvas.create_text(x, y, text=sym, font=build_font(family, sz, b, it, un),
+                                             fill=color, anchor="n")
+            preview_items.append({"cid": cid, "spec": spec})
+            continue
+        item = preview_items[idx]
+        old = item["spec"]
+        if old == spec:
+            continue
+        if old[:2] != spec[:2]:
+            preview_canvas.coords(item["cid"], x, y)
+        if old[2:] != spec[2:]:
+            preview_canvas.itemconfigure(item["cid"], text=sym, fill=color,
+                                         font=build_font(family, sz, b, it, un))
+        item["spec"] = spec
+    for item in preview_items[len(specs):]:
+        preview_canvas.delete(item["cid"])
+    del preview_items[len(specs):]
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    preview_timing_label.config(text=f"Preview refresh: {elapsed_ms:.2f} ms")
+    ui_profile.count("preview_refreshes")
+    ui_profile.count("preview_refresh_ms", round(elapsed_ms, 3))
     check_sums_and_required()
 
 ###################################
@@ -239,26 +280,29 @@ def auto_distribute_distractors():
     total_val = safe_get_int_from_stringvar(total_items_var, 0)
     if total_val <= 0:
         return
-    t_sum = sum(v.get() for v in target_quantity_vars)
+    t_sum = target_rows.total_quantity
     leftover = total_val - t_sum
     if leftover < 0:
         return
-    rowcount = len(distractor_quantity_vars)
+    rowcount = len(distractor_rows)
     if rowcount == 0:
         return
     base_val = leftover // rowcount
     remainder = leftover % rowcount
-    for i in range(rowcount):
-        newVal = base_val + 1 if i < remainder else base_val
-        distractor_quantity_vars[i].set(newVal)
+    with distractor_rows.batch():
+        for i, row in enumerate(distractor_rows):
+            newVal = base_val + 1 if i < remainder else base_val
+            # only write (and trigger traces) when the value really changes
+            if row.quantity != newVal:
+                row.ui["quantity"].set(newVal)
 
 ###################################
 # Sum & Required Check
 ###################################
 def check_sums_and_required(*args):
     auto_distribute_distractors()
-    t_sum = sum(v.get() for v in target_quantity_vars)
-    d_sum = sum(v.get() for v in distractor_quantity_vars)
+    t_sum = target_rows.total_quantity
+    d_sum = distractor_rows.total_quantity
     total_val = safe_get_int_from_stringvar(total_items_var, 0)
 
     sum_ok = (t_sum + d_sum == total_val) and (total_val > 0)
@@ -285,168 +329,314 @@ def check_sums_and_required(*args):
 # Color logic
 ###################################
 def choose_preview_background_color():
+    from tkinter import colorchooser
     chosen = colorchooser.askcolor(title="Choose background color")[1]
     if chosen:
         preview_canvas.configure(bg=chosen)
 
-def choose_color(idx, section):
+def choose_color(row):
+    from tkinter import colorchooser
     chosen = colorchooser.askcolor(title="Choose text color")[1]
     if chosen:
-        if section == "targets":
-            text_color_vars[idx].set(chosen)
-        else:
-            distractor_text_color_vars[idx].set(chosen)
-    schedule_debounced_update()
+        row.ui["color"].set(chosen)
 
 ###################################
 # LEFT COLUMN WIDGETS
 ###################################
-rpcnbi_title = ttk.Label(left_frame, text="RP-CNBI Search Task", font=("Arial", 16))
-rpcnbi_title.grid(row=0, column=0, pady=10, sticky="w")
-
-setup_label = ttk.Label(left_frame, text="Set up", font=("Arial", 14))
-setup_label.grid(row=1, column=0, sticky="w", pady=5)
-
-study_id_label = ttk.Label(left_frame, text="Study ID:* ")
-study_id_label.grid(row=2, column=0, sticky="w")
-study_id_entry = ttk.Entry(left_frame, width=20)
-study_id_entry.grid(row=2, column=1, sticky="w", padx=5)
-study_id_entry.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-
-session_label = ttk.Label(left_frame, text="Session #:* ")
-session_label.grid(row=3, column=0, sticky="w", pady=(5,0))
-session_entry = ttk.Entry(left_frame, width=20)
-session_entry.grid(row=3, column=1, sticky="w", padx=5)
-session_entry.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-
-admin_label = ttk.Label(left_frame, text="Administrator:* ")
-admin_label.grid(row=4, column=0, sticky="w", pady=(5,0))
-admin_entry = ttk.Entry(left_frame, width=20)
-admin_entry.grid(row=4, column=1, sticky="w", padx=5)
-admin_entry.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-
-advanced_button = ttk.Button(left_frame, text="Advanced Settings")
-advanced_button.grid(row=5, column=0, pady=5, sticky="w")
-
-advanced_settings_frame = ttk.Frame(left_frame, padding=10)
-advanced_settings_frame.grid(row=6, column=0, columnspan=2, sticky="ew")
-advanced_settings_frame.grid_remove()
-
-screen_size_var = tk.StringVar(value="same as computer")
-refresh_rate_var = tk.StringVar(value="same as computer")
-input_type_var = tk.StringVar(value="Mouse")
-
-screen_size_label = ttk.Label(advanced_settings_frame, text="Screen Size:")
-screen_size_label.grid(row=0, column=0, sticky="w")
-screen_size_dropdown = ttk.Combobox(
-    advanced_settings_frame,
-    textvariable=screen_size_var,
-    values=screen_size_options,
-    state="readonly"
-)
-screen_size_dropdown.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-
-refresh_rate_label = ttk.Label(advanced_settings_frame, text="Refresh Rate:")
-refresh_rate_label.grid(row=1, column=0, sticky="w")
-refresh_rate_dropdown = ttk.Combobox(
-    advanced_settings_frame,
-    textvariable=refresh_rate_var,
-    values=refresh_rate_options,
-    state="readonly"
-)
-refresh_rate_dropdown.grid(row=1, column=1, padx=5, pady=5, sticky="w")
-
-input_type_label = ttk.Label(advanced_settings_frame, text="Input Type:")
-input_type_label.grid(row=2, column=0, sticky="w")
-touch_radio = ttk.Radiobutton(advanced_settings_frame, text="Touch", variable=input_type_var, value="Touch")
-touch_radio.grid(row=2, column=1, sticky="w")
-mouse_radio = ttk.Radiobutton(advanced_settings_frame, text="Mouse", variable=input_type_var, value="Mouse")
-mouse_radio.grid(row=2, column=2, sticky="w")
+def build_settings_vars():
+    """
+    The Tk variables behind the Advanced Settings, which exist (and are read
+    by get_configuration) whether or not that section has been opened.
+    """
+    global screen_size_var, refresh_rate_var, input_type_var, layout_algorithm_var
+    global seed_var, layout_file_var, render_mode_var, profile_var, output_backend_var, database_var
+    screen_size_var = tk.StringVar(value="same as computer")
+    refresh_rate_var = tk.StringVar(value="same as computer")
+    input_type_var = tk.StringVar(value="Mouse")
+    layout_algorithm_var = tk.StringVar(value=placement.LAYOUT_RANDOM)
+    seed_var = tk.StringVar(value="")
+    layout_file_var = tk.StringVar(value="")
+    render_mode_var = tk.StringVar(value=raster_render.RENDER_VECTOR)
+    profile_var = tk.BooleanVar(value=False)
+    output_backend_var = tk.StringVar(value=output_backend_options[0])
+    database_var = tk.StringVar(value="")
+
+def build_left_column():
+    global study_id_entry, session_entry, admin_entry, advanced_settings_frame
+    global total_items_var, sum_status_label, trial_count_var, targets_frame, distractors_frame
+    global trial_count_spin, block_frame, block_status_label
+    rpcnbi_title = ttk.Label(left_frame, text="RP-CNBI Search Task", font=("Arial", 16))
+    rpcnbi_title.grid(row=0, column=0, pady=10, sticky="w")
+
+    setup_label = ttk.Label(left_frame, text="Set up", font=("Arial", 14))
+    setup_label.grid(row=1, column=0, sticky="w", pady=5)
+
+    study_id_label = ttk.Label(left_frame, text="Study ID:* ")
+    study_id_label.grid(row=2, column=0, sticky="w")
+    study_id_entry = ttk.Entry(left_frame, width=20)
+    study_id_entry.grid(row=2, column=1, sticky="w", padx=5)
+    study_id_entry.bind("<KeyRelease>", lambda e: schedule_debounced_update())
+
+    session_label = ttk.Label(left_frame, text="Session #:* ")
+    session_label.grid(row=3, column=0, sticky="w", pady=(5,0))
+    session_entry = ttk.Entry(left_frame, width=20)
+    session_entry.grid(row=3, column=1, sticky="w", padx=5)
+    session_entry.bind("<KeyRelease>", lambda e: schedule_debounced_update())
+
+    admin_label = ttk.Label(left_frame, text="Administrator:* ")
+    admin_label.grid(row=4, column=0, sticky="w", pady=(5,0))
+    admin_entry = ttk.Entry(left_frame, width=20)
+    admin_entry.grid(row=4, column=1, sticky="w", padx=5)
+    admin_entry.bind("<KeyRelease>", lambda e: schedule_debounced_update())
+
+    advanced_button = ttk.Button(left_frame, text="Advanced Settings", command=toggle_advanced_settings)
+    advanced_button.grid(row=5, column=0, pady=5, sticky="w")
+
+    advanced_settings_frame = ttk.Frame(left_frame, padding=10)
+    advanced_settings_frame.grid(row=6, column=0, columnspan=2, sticky="ew")
+    advanced_settings_frame.grid_remove()
+
+    trial_settings_label = ttk.Label(left_frame, text="Trial Settings", font=("Arial", 14))
+    trial_settings_label.grid(row=7, column=0, sticky="w", pady=10)
+
+    total_items_var = tk.StringVar(value="")
+    num_items_lbl = ttk.Label(left_frame, text="Number of items total:", font=("Arial", 12, "bold"))
+    num_items_lbl.grid(row=8, column=0, sticky="w", pady=(5,2))
+
+    total_items_spin = tk.Spinbox(left_frame, from_=1, to=9999,
+        textvariable=total_items_var, width=5, font=("Arial", 11),
+        command=total_items_spin_event)
+    total_items_spin.grid(row=8, column=1, sticky="w")
+    total_items_var.trace_add("write", total_items_spin_event)
+
+    sum_status_label = ttk.Label(left_frame, text="", font=("Arial", 10, "bold"))
+    sum_status_label.grid(row=8, column=2, sticky="w", padx=5)
+
+    note_label = ttk.Label(
+        left_frame,
+        text="(# distractors = total - # targets)",
+        font=("Arial", 8)
+    )
+    note_label.grid(row=9, column=0, columnspan=3, sticky="w", pady=(2,10))
+
+    trial_count_var = tk.StringVar(value="1")
+    trial_count_lbl = ttk.Label(left_frame, text="Number of trials:")
+    trial_count_lbl.grid(row=10, column=0, sticky="w", pady=(0,5))
+    trial_count_spin = tk.Spinbox(left_frame, from_=1, to=999,
+        textvariable=trial_count_var, width=5, font=("Arial", 11))
+    trial_count_spin.grid(row=10, column=1, sticky="w")
+
+    block_frame = ttk.Frame(left_frame)
+    block_frame.grid(row=10, column=2, sticky="w", padx=5)
+    block_status_label = ttk.Label(block_frame, text="", font=("Arial", 10))
+    block_status_label.grid(row=0, column=0, sticky="w")
+    clear_block_btn = ttk.Button(block_frame, text="Clear block", command=clear_block)
+    clear_block_btn.grid(row=0, column=1, padx=5)
+    block_frame.grid_remove()
+
+    targets_label = ttk.Label(left_frame, text="Targets", font=("Arial", 12))
+    targets_label.grid(row=11, column=0, sticky="w", pady=5)
+    targets_frame = ttk.Frame(left_frame, padding=10)
+    targets_frame.grid(row=12, column=0, columnspan=3, sticky="ew")
+
+    distractors_label = ttk.Label(left_frame, text="Distractors", font=("Arial", 12))
+    distractors_label.grid(row=13, column=0, sticky="w", pady=5)
+    distractors_frame = ttk.Frame(left_frame, padding=10)
+    distractors_frame.grid(row=14, column=0, columnspan=3, sticky="ew")
+
+    left_frame.rowconfigure(15, weight=1)
+
+def choose_layout_file():
+    from tkinter import filedialog
+    filename = filedialog.askopenfilename(
+        defaultextension=layout_file.FILE_EXTENSION,
+        filetypes=[("Layout files", "*" + layout_file.FILE_EXTENSION), ("All files", "*.*")]
+    )
+    if filename:
+        layout_file_var.set(filename)
+
+def choose_database():
+    from tkinter import filedialog
+    import session_store
+    filename = filedialog.asksaveasfilename(
+        defaultextension=".sqlite3",
+        initialfile=session_store.DEFAULT_DATABASE,
+        filetypes=[("SQLite databases", "*.sqlite3 *.db"), ("All files", "*.*")],
+        confirmoverwrite=False
+    )
+    if filename:
+        database_var.set(filename)
+
+# The Advanced Settings widgets are only built the first time the section is opened
+advanced_settings_built = False
+
+def build_advanced_settings():
+    global advanced_settings_built
+    advanced_settings_built = True
+    screen_size_label = ttk.Label(advanced_settings_frame, text="Screen Size:")
+    screen_size_label.grid(row=0, column=0, sticky="w")
+    screen_size_dropdown = ttk.Combobox(
+        advanced_settings_frame,
+        textvariable=screen_size_var,
+        values=screen_size_options,
+        state="readonly"
+    )
+    screen_size_dropdown.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+
+    refresh_rate_label = ttk.Label(advanced_settings_frame, text="Refresh Rate:")
+    refresh_rate_label.grid(row=1, column=0, sticky="w")
+    refresh_rate_dropdown = ttk.Combobox(
+        advanced_settings_frame,
+        textvariable=refresh_rate_var,
+        values=refresh_rate_options,
+        state="readonly"
+    )
+    refresh_rate_dropdown.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+
+    input_type_label = ttk.Label(advanced_settings_frame, text="Input Type:")
+    input_type_label.grid(row=2, column=0, sticky="w")
+    touch_radio = ttk.Radiobutton(advanced_settings_frame, text="Touch", variable=input_type_var, value="Touch")
+    touch_radio.grid(row=2, column=1, sticky="w")
+    mouse_radio = ttk.Radiobutton(advanced_settings_frame, text="Mouse", variable=input_type_var, value="Mouse")
+    mouse_radio.grid(row=2, column=2, sticky="w")
+
+    layout_algorithm_label = ttk.Label(advanced_settings_frame, text="Layout:")
+    layout_algorithm_label.grid(row=3, column=0, sticky="w")
+    layout_algorithm_dropdown = ttk.Combobox(
+        advanced_settings_frame,
+        textvariable=layout_algorithm_var,
+        values=layout_algorithm_options,
+        state="readonly"
+    )
+    layout_algorithm_dropdown.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+
+    seed_label = ttk.Label(advanced_settings_frame, text="Seed (blank = random):")
+    seed_label.grid(row=4, column=0, sticky="w")
+    seed_entry = ttk.Entry(advanced_settings_frame, textvariable=seed_var, width=12)
+    seed_entry.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+
+    layout_file_label = ttk.Label(advanced_settings_frame, text="Layout file:")
+    layout_file_label.grid(row=5, column=0, sticky="w")
+    layout_file_entry = ttk.Entry(advanced_settings_frame, textvariable=layout_file_var, width=30)
+    layout_file_entry.grid(row=5, column=1, padx=5, pady=5, sticky="w")
+    layout_file_button = ttk.Button(advanced_settings_frame, text="Browse...", command=choose_layout_file)
+    layout_file_button.grid(row=5, column=2, sticky="w")
+
+    render_mode_label = ttk.Label(advanced_settings_frame, text="Rendering:")
+    render_mode_label.grid(row=6, column=0, sticky="w")
+    render_mode_dropdown = ttk.Combobox(
+        advanced_settings_frame,
+        textvariable=render_mode_var,
+        values=render_mode_options,
+        state="readonly"
+    )
+    render_mode_dropdown.grid(row=6, column=1, padx=5, pady=5, sticky="w")
+
+    profile_check = ttk.Checkbutton(advanced_settings_frame, text="Profile session (timings next to the CSV)",
+                                    variable=profile_var)
+    profile_check.grid(row=7, column=0, columnspan=3, sticky="w")
+
+    output_backend_label = ttk.Label(advanced_settings_frame, text="Save responses to:")
+    output_backend_label.grid(row=8, column=0, sticky="w")
+    output_backend_dropdown = ttk.Combobox(
+        advanced_settings_frame,
+        textvariable=output_backend_var,
+        values=output_backend_options,
+        state="readonly"
+    )
+    output_backend_dropdown.grid(row=8, column=1, padx=5, pady=5, sticky="w")
+
+    database_label = ttk.Label(advanced_settings_frame, text="Database (sqlite):")
+    database_label.grid(row=9, column=0, sticky="w")
+    database_entry = ttk.Entry(advanced_settings_frame, textvariable=database_var, width=30)
+    database_entry.grid(row=9, column=1, padx=5, pady=5, sticky="w")
+    database_button = ttk.Button(advanced_settings_frame, text="Browse...", command=choose_database)
+    database_button.grid(row=9, column=2, sticky="w")
 
 def toggle_advanced_settings():
+    if not advanced_settings_built:
+        build_advanced_settings()
     if advanced_settings_frame.winfo_viewable():
         advanced_settings_frame.grid_remove()
     else:
         advanced_settings_frame.grid()
 
-advanced_button.config(command=toggle_advanced_settings)
-
-trial_settings_label = ttk.Label(left_frame, text="Trial Settings", font=("Arial", 14))
-trial_settings_label.grid(row=7, column=0, sticky="w", pady=10)
-
-total_items_var = tk.StringVar(value="")
 def total_items_spin_event(*args):
     schedule_debounced_update()
 
-num_items_lbl = ttk.Label(left_frame, text="Number of items total:", font=("Arial", 12, "bold"))
-num_items_lbl.grid(row=8, column=0, sticky="w", pady=(5,2))
-
-total_items_spin = tk.Spinbox(left_frame, from_=1, to=9999,
-    textvariable=total_items_var, width=5, font=("Arial", 11),
-    command=total_items_spin_event)
-total_items_spin.grid(row=8, column=1, sticky="w")
-total_items_var.trace_add("write", total_items_spin_event)
-
-sum_status_label = ttk.Label(left_frame, text="", font=("Arial", 10, "bold"))
-sum_status_label.grid(row=8, column=2, sticky="w", padx=5)
-
-note_label = ttk.Label(
-    left_frame,
-    text="(# distractors = total - # targets)",
-    font=("Arial", 8)
-)
-note_label.grid(row=9, column=0, columnspan=3, sticky="w", pady=(2,10))
-
-targets_label = ttk.Label(left_frame, text="Targets", font=("Arial", 12))
-targets_label.grid(row=11, column=0, sticky="w", pady=5)
-targets_frame = ttk.Frame(left_frame, padding=10)
-targets_frame.grid(row=12, column=0, columnspan=3, sticky="ew")
-
-distractors_label = ttk.Label(left_frame, text="Distractors", font=("Arial", 12))
-distractors_label.grid(row=13, column=0, sticky="w", pady=5)
-distractors_frame = ttk.Frame(left_frame, padding=10)
-distractors_frame.grid(row=14, column=0, columnspan=3, sticky="ew")
-
-left_frame.rowconfigure(15, weight=1)
-
 ############################################
 # RIGHT COLUMN: PREVIEW
 ############################################
-preview_lbl = ttk.Label(right_frame, text="Preview", font=("Arial", 14, "bold"))
-preview_lbl.grid(row=7, column=0, sticky="w", pady=5)
+def build_preview():
+    global preview_canvas, preview_timing_label
+    preview_lbl = ttk.Label(right_frame, text="Preview", font=("Arial", 14, "bold"))
+    preview_lbl.grid(row=7, column=0, sticky="w", pady=5)
+
+    preview_canvas = tk.Canvas(
+        right_frame,
+        width=PREVIEW_DEFAULT_WIDTH,
+        height=PREVIEW_DEFAULT_HEIGHT,
+        bg="white",
+        highlightthickness=1,
+        highlightbackground="black"
+    )
+    preview_canvas.grid(row=8, column=0, padx=10, pady=5)
 
-preview_canvas = tk.Canvas(
-    right_frame,
-    width=PREVIEW_DEFAULT_WIDTH,
-    height=PREVIEW_DEFAULT_HEIGHT,
-    bg="white",
-    highlightthickness=1,
-    highlightbackground="black"
-)
-preview_canvas.grid(row=8, column=0, padx=10, pady=5)
+    bg_color_button = ttk.Button(right_frame, text="Change Background Color", command=choose_preview_background_color)
+    bg_color_button.grid(row=9, column=0, pady=10)
 
-bg_color_button = ttk.Button(right_frame, text="Change Background Color", command=choose_preview_background_color)
-bg_color_button.grid(row=9, column=0, pady=10)
+    preview_timing_label = ttk.Label(right_frame, text="", foreground="gray", font=("Arial", 8))
+    preview_timing_label.grid(row=10, column=0)
 
-right_frame.rowconfigure(10, weight=1)
-right_frame.columnconfigure(0, weight=1)
+    right_frame.rowconfigure(11, weight=1)
+    right_frame.columnconfigure(0, weight=1)
 
 ############################################
 # BOTTOM BUTTONS
 ############################################
-bottom_btns_frame = ttk.Frame(content_frame, padding=10)
-bottom_btns_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
+def build_bottom_buttons():
+    global error_label, run_btn
+    bottom_btns_frame = ttk.Frame(content_frame, padding=10)
+    bottom_btns_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
+
+    bottom_btns_frame.columnconfigure(0, weight=1)
+    bottom_btns_frame.columnconfigure(1, weight=1)
+    bottom_btns_frame.columnconfigure(2, weight=1)
+
+    error_label = ttk.Label(bottom_btns_frame, text="", foreground="red", font=("Arial", 10, "bold"))
+    error_label.grid(row=1, column=0, columnspan=3, sticky="n")
+
+    export_btn = ttk.Button(bottom_btns_frame, text="Export Settings to JSON", width=25, command=export_configuration_to_json)
+    export_btn.grid(row=0, column=0, padx=5, pady=5)
 
-bottom_btns_frame.columnconfigure(0, weight=1)
-bottom_btns_frame.columnconfigure(1, weight=1)
-bottom_btns_frame.columnconfigure(2, weight=1)
+    import_btn = ttk.Button(bottom_btns_frame, text="Import Settings from JSON", width=25, command=import_configuration_from_json)
+    import_btn.grid(row=0, column=1, padx=5, pady=5)
 
-error_label = ttk.Label(bottom_btns_frame, text="", foreground="red", font=("Arial", 10, "bold"))
-error_label.grid(row=1, column=0, columnspan=3, sticky="n")
+    run_btn = ttk.Button(bottom_btns_frame, text="\u25B6 RUN TASK", command=validate_and_run)
+    run_btn.config(width=50)
+    run_btn.grid(row=0, column=2, padx=5, pady=5)
+    run_btn.state(["disabled"])
 
 ############################################
 # GET/SET CONFIG
 ############################################
+def show_block_status():
+    """
+    Show the imported block (and disable "Number of trials", which it replaces), if any.
+    """
+    if loaded_block:
+        block_status_label.config(text=f"Block of {len(loaded_block)} trials (imported)")
+        trial_count_spin.config(state="disabled")
+        block_frame.grid()
+    else:
+        trial_count_spin.config(state="normal")
+        block_frame.grid_remove()
+
+def clear_block():
+    global loaded_block
+    loaded_block = None
+    show_block_status()
+
 def get_configuration():
     """
     Gather all variables for JSON or for the actual task.
@@ -458,44 +648,82 @@ def get_configuration():
     cfg["screen_size"] = screen_size_var.get()
     cfg["refresh_rate"] = refresh_rate_var.get()
     cfg["input_type"] = input_type_var.get()
+    cfg["layout_algorithm"] = layout_algorithm_var.get()
+    cfg["seed"] = safe_get_int_from_stringvar(seed_var, None)
+    cfg["layout_file"] = layout_file_var.get().strip() or None
+    cfg["render_mode"] = render_mode_var.get()
+    cfg["profile"] = profile_var.get()
+    cfg["output_backend"] = output_backend_var.get()
+    cfg["database"] = database_var.get().strip() or None
 
     cfg["total_items"] = safe_get_int_from_stringvar(total_items_var, 0)
+    cfg["trials"] = max(1, safe_get_int_from_stringvar(trial_count_var, 1))
 
-    # Targets
-    cfg["targets"] = []
-    for i in range(len(target_symbol_vars)):
-        cfg["targets"].append({
-            "symbol": target_symbol_vars[i].get(),
-            "font": font_var_vars[i].get(),
-            "size": safe_get_int(text_size_vars[i], 18),
-            "bold": bold_vars[i].get(),
-            "underline": underline_vars[i].get(),
-            "italic": italic_vars[i].get(),
-            "color": text_color_vars[i].get(),
-            "quantity": target_quantity_vars[i].get(),
-        })
-
-    # Distractors
-    cfg["distractors"] = []
-    for i in range(len(distractor_symbol_vars)):
-        cfg["distractors"].append({
-            "symbol": distractor_symbol_vars[i].get(),
-            "font": distractor_font_var_vars[i].get(),
-            "size": safe_get_int(distractor_text_size_vars[i], 18),
-            "bold": distractor_bold_vars[i].get(),
-            "underline": distractor_underline_vars[i].get(),
-            "italic": distractor_italic_vars[i].get(),
-            "color": distractor_text_color_vars[i].get(),
-            "quantity": distractor_quantity_vars[i].get(),
-        })
+    cfg["targets"] = [row.as_config() for row in target_rows]
+    cfg["distractors"] = [row.as_config() for row in distractor_rows]
+    if loaded_block:
+        cfg["block"] = [dict(entry) for entry in loaded_block]
     return cfg
 
 def set_configuration(cfg):
-    # If you implement an "Import" feature that sets all fields
-    # from a JSON, you would fill this out. For now, it's unused.
-    pass
+    """
+    Load a configuration (as from get_configuration / an exported JSON) into
+    the UI in one batch: Tk variable traces and row-table notifications are
+    held back, each panel's rows are rebuilt once (reusing pooled widgets),
+    and the preview and validation run once at the end.
+    The configuration's types are checked (and e.g. "3" converted to 3) by
+    validation.normalize_configuration first; if that fails, the error is
+    shown under the Run button, the UI is left as it was and False returned.
+    """
+    global updates_held, debounce_id, distr_auto_enabled, loaded_block
+    start = time.perf_counter()
+    cfg, error = validation.normalize_configuration(cfg)
+    if error:
+        error_label.config(text=error)
+        return False
+    updates_held = True
+    try:
+        for entry, key in ((study_id_entry, "study_id"), (session_entry, "session"),
+                           (admin_entry, "administrator")):
+            entry.delete(0, "end")
+            entry.insert(0, str(cfg.get(key) or ""))
+
+        screen_size_var.set(cfg.get("screen_size", "same as computer"))
+        refresh_rate_var.set(cfg.get("refresh_rate", "same as computer"))
+        input_type_var.set(cfg.get("input_type", "Mouse"))
+        layout_algorithm_var.set(cfg.get("layout_algorithm", placement.LAYOUT_RANDOM))
+        seed = cfg.get("seed")
+        seed_var.set("" if seed is None else str(seed))
+        layout_file_var.set(cfg.get("layout_file") or "")
+        render_mode_var.set(cfg.get("render_mode", raster_render.RENDER_VECTOR))
+        profile_var.set(bool(cfg.get("profile", False)))
+        output_backend_var.set(cfg.get("output_backend", output_backend_options[0]))
+        database_var.set(cfg.get("database") or "")
+
+        total = cfg.get("total_items")
+        total_items_var.set("" if not total else str(total))
+        trial_count_var.set(str(cfg.get("trials", 1)))
+        # kept as imported: the rows below are the base every block entry overrides
+        loaded_block = cfg.get("block") or None
+        show_block_status()
+
+        # the imported quantities are what the file says, not an even split
+        distr_auto_enabled = False
+        notes = [target_panel.load(cfg.get("targets", [])),
+                 distractor_panel.load(cfg.get("distractors", []))]
+    finally:
+        updates_held = False
+    if debounce_id is not None:
+        root.after_cancel(debounce_id)
+        debounce_id = None
+    error_label.config(text=" ".join(note for note in notes if note))
+    update_preview_canvas()
+    ui_profile.add_phase("set_configuration", start, time.perf_counter(),
+                         targets=len(target_rows), distractors=len(distractor_rows))
+    return True
 
 def export_configuration_to_json():
+    from tkinter import filedialog
     filename = filedialog.asksaveasfilename(
         defaultextension=".json",
         filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
@@ -506,70 +734,107 @@ def export_configuration_to_json():
             json.dump(cfg, f, indent=2)
 
 def import_configuration_from_json():
+    from tkinter import filedialog
     filename = filedialog.askopenfilename(
         defaultextension=".json",
         filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
     )
     if filename:
-        with open(filename, "r") as f:
-            cfg = json.load(f)
+        try:
+            with open(filename, "r") as f:
+                cfg = json.load(f)
+        except (OSError, ValueError) as e:
+            error_label.config(text=f"Error: cannot read {os.path.basename(filename)} ({e}).")
+            return
         set_configuration(cfg)
 
-export_btn = ttk.Button(bottom_btns_frame, text="Export Settings to JSON", width=25, command=export_configuration_to_json)
-export_btn.grid(row=0, column=0, padx=5, pady=5)
-
-import_btn = ttk.Button(bottom_btns_frame, text="Import Settings from JSON", width=25, command=import_configuration_from_json)
-import_btn.grid(row=0, column=1, padx=5, pady=5)
-
 ############################################
 # MAIN TASK LOGIC
 ############################################
 def start_task(config):
     """
     Replaces the UI with the actual search display.
+    Runs the block of trials from trials.expand_block(config): one trial per
+    "block" entry, or config["trials"] repeats of the configuration.
     Randomly places the chosen symbols (targets and distractors).
     Logs clicks to a CSV with columns matching your snippet:
         "ClickX","ClickY",
         "NearestLetterChar","NearestLetterType",
         "LetterCenterX","LetterCenterY",
         "DistanceToSelection","DistanceToNearestTarget"
-
-    Each symbol disappears on click and is no longer clickable.
+    followed by timing columns (milliseconds):
+        "MonotonicTimeMs"      - time.perf_counter() when the handler ran
+        "EventTimeMs"          - Tk's event.time for the click
+        "TimeSinceOnsetMs"     - since the first frame of the display was drawn
+        "TimeSincePrevClickMs" - since the previous logged click in the trial (blank for the first)
+        "HandlerDelayMs"       - handler entry to the row being queued for the writer
+                                 thread (stamped inside response_logger.log())
+        "DispatchDelayMs"      - the click's event.time to handler entry, i.e. time
+                                 spent in the OS and Tk before on_click ran. The two
+                                 clocks are aligned by the smallest difference seen
+                                 so far in the session, so this is relative to the
+                                 fastest-dispatched click (0 for it), a lower bound
+    and "Trial", the 1-based trial number within the block.
+
+    Each symbol disappears on click and is no longer clickable. Once every
+    target of a trial has been found, the next trial follows after
+    INTER_TRIAL_INTERVAL_MS; its layout was built in the background while
+    the current trial was running. The last trial stays up until the
+    window is closed.
+    Layouts come from a per-trial RNG seeded from config["seed"] (a random
+    seed is drawn and recorded if none is set), or from config["layout_file"].
+    Each trial's layout is saved as <csv name>_trial<n>.layout for replay.
+    With config["render_mode"] == "raster" (and Pillow installed) the whole
+    display is one composited image instead of one text item per glyph.
+    Glyph sizes are measured once per unique style (see glyph_metrics.py).
+    A placement report per trial (requested vs. placed targets/distractors,
+    plus render mode, draw time and pixel memory) is written next to the
+    CSV as <csv name>_placement.json, and per-trial display timing (onset
+    delay, late/dropped frames against config["refresh_rate"], see
+    frame_timing.py) as <csv name>_frames.json.
+    With profiling on (config["profile"] or SEARCHTASK_PROFILE, see
+    profiling.py) the time spent in each phase, the placement retry and
+    failure counts and the time to first onset go to <csv name>_profile.json.
+    With config["output_backend"] == "sqlite" the rows go to the SQLite
+    database config["database"] instead of the CSV, together with the
+    configuration (see session_store.py); the other files keep the name
+    the CSV would have had.
     """
-    # 1) Clear out the old UI frames
-    for child in root.winfo_children():
-        child.destroy()
+    global glyph_metrics_cache
+    profile = profiling.SessionProfile(profiling.profile_mode(config))
+    profile.start_cprofile()
 
-    # 2) Build a new full-frame canvas for the task
-    task_canvas = tk.Canvas(root, bg="white")
-    task_canvas.pack(fill="both", expand=True)
-
-    # 3) Prepare CSV logging (matching your snippet's columns)
+    # 1) Clear out the old UI frames
+    with profile.phase("clear_ui"):
+        for child in root.winfo_children():
+            child.destroy()
+
+        # 2) Build a new full-frame canvas for the task
+        task_canvas = tk.Canvas(root, bg="white")
+        task_canvas.pack(fill="both", expand=True)
+
+    # 3) Prepare CSV (or SQLite) logging (matching your snippet's columns)
+    csv_open_start = time.perf_counter()
+    if config.get("seed") is None:
+        config = dict(config, seed=trials.new_seed())
     timestamp = time.strftime("%Y%m%d-%H%M%S")
     csv_filename = f"responses_{config['study_id']}_session{config['session']}_{timestamp}.csv"
-    csv_file = open(csv_filename, mode="w", newline="", encoding="utf-8")
-    writer = csv.writer(csv_file)
-    writer.writerow([
-        "ClickX","ClickY",
-        "NearestLetterChar","NearestLetterType",
-        "LetterCenterX","LetterCenterY",
-        "DistanceToSelection","DistanceToNearestTarget"
-    ])
-
-    # 4) Expand targets/distractors
-    items_to_place = []
-    for t in config["targets"]:
-        # t is a dict with "symbol","font","size","color",...
-        for _ in range(t["quantity"]):
-            items_to_place.append((t, True))  # (dict, is_target=True)
-
-    for d in config["distractors"]:
-        for _ in range(d["quantity"]):
-            items_to_place.append((d, False)) # (dict, is_target=False)
+    csv_stem = csv_filename[:-len(".csv")]
+    import response_log
+    import session_store
+    response_header = response_log.RESPONSE_COLUMNS
+    handler_delay_column = response_header.index("HandlerDelayMs")
+    if config.get("output_backend") == session_store.OUTPUT_SQLITE:
+        response_logger = session_store.SQLiteSessionLogger(
+            config.get("database") or session_store.DEFAULT_DATABASE, response_header, config,
+            name=csv_stem, flush_rows=LOG_FLUSH_ROWS, flush_interval=LOG_FLUSH_INTERVAL_S)
+    else:
+        response_logger = response_log.BufferedCSVLogger(
+            csv_filename, response_header, flush_rows=LOG_FLUSH_ROWS, flush_interval=LOG_FLUSH_INTERVAL_S)
+    profile.add_phase("csv_open", csv_open_start, time.perf_counter())
 
-    # 5) Random placement with a min distance so they don't overlap
-    min_dist = 40  # adjust as needed
-    placed_items = []  # store dicts: { cid, symbol, type, x, y, w, h }
+    # 4) Measure glyphs on the live canvas (the layout pipeline itself is Tk-free)
+    min_dist = placement.DEFAULT_MIN_DIST  # adjust as needed
 
     def measure_text_bbox(sym_conf):
         ft = build_font(
@@ -586,100 +851,208 @@ def start_task(config):
         h = bbox[3] - bbox[1]
         return w,h
 
-    def boxes_overlap(x1, y1, w1, h1, x2, y2, w2, h2, dist_threshold):
-        # We'll check center distance
-        cx1, cy1 = x1 + w1/2, y1 + h1/2
-        cx2, cy2 = x2 + w2/2, y2 + h2/2
-        dist = math.sqrt((cx1 - cx2)**2 + (cy1 - cy2)**2)
-        return (dist < dist_threshold)
-
-    root.update_idletasks()
-    c_width = task_canvas.winfo_width()
-    c_height = task_canvas.winfo_height()
-
-    random.shuffle(items_to_place)
-
-    # place them
-    for (sym_conf, is_t) in items_to_place:
-        w_text, h_text = measure_text_bbox(sym_conf)
-        max_tries = 1000
-        placed = False
-        for _ in range(max_tries):
-            x_rand = random.randint(0, max(0, c_width - w_text))
-            y_rand = random.randint(0, max(0, c_height - h_text))
-
-            overlap_found = False
-            for item in placed_items:
-                if boxes_overlap(x_rand, y_rand, w_text, h_text,
-                                 item["x"], item["y"], item["w"], item["h"],
-                                 min_dist):
-                    overlap_found = True
-                    break
-            if not overlap_found:
-                # place it
-                ft = build_font(
-                    sym_conf["font"],
-                    sym_conf["size"],
-                    sym_conf["bold"],
-                    sym_conf["italic"],
-                    sym_conf["underline"]
-                )
-                cid = task_canvas.create_text(x_rand, y_rand,
-                                              text=sym_conf["symbol"],
-                                              font=ft,
-                                              fill=sym_conf["color"],
-                                              anchor="nw")
-                placed_items.append({
-                    "cid": cid,
-                    "symbol": sym_conf["symbol"],
-                    "is_target": is_t,
-                    "x": x_rand,
-                    "y": y_rand,
-                    "w": w_text,
-                    "h": h_text
-                })
-                placed = True
-                break
-        if not placed:
-            print(f"Warning: Could not place '{sym_conf['symbol']}' after many tries.")
+    with profile.phase("glyph_cache"):
+        if glyph_metrics_cache is None:
+            metrics_context = f"{platform.system()}:{root.tk.call('tk', 'scaling')}"
+            glyph_metrics_cache = glyph_metrics.GlyphMetricsCache(GLYPH_CACHE_FILE, metrics_context)
+
+    with profile.phase("canvas_geometry"):
+        root.update_idletasks()
+        c_width = task_canvas.winfo_width()
+        c_height = task_canvas.winfo_height()
+
+    # 5) Expand -> measure -> shuffle -> place, with a min distance so they don't overlap.
+    # The scheduler builds each trial's layout one trial ahead, in the background.
+    scheduler = trials.TrialScheduler(trials.expand_block(config), c_width, c_height,
+                                      measure=glyph_metrics_cache.provider(measure_text_bbox),
+                                      min_dist=min_dist, save_prefix=csv_stem,
+                                      profile=profile.enabled)
+    report_filename = csv_stem + "_placement.json"
+    profile_filename = csv_stem + "_profile.json"
+    profile_trials = []
+
+    def write_profile():
+        profile.write(profile_filename, csv=response_logger.filename, setup_ui=ui_profile.as_dict(),
+                      trials=profile_trials)
+    placement_reports = []
+
+    # Display timing against the configured refresh rate and screen size
+    frames_filename = csv_stem + "_frames.json"
+    refresh_hz = frame_timing.parse_refresh_rate(config.get("refresh_rate"))
+    expected_screen = frame_timing.parse_screen_size(config.get("screen_size"))
+    actual_screen = (root.winfo_screenwidth(), root.winfo_screenheight())
+    if expected_screen is not None and expected_screen != actual_screen:
+        print(f"Warning: screen size is set to {expected_screen[0]}x{expected_screen[1]} "
+              f"but this screen is {actual_screen[0]}x{actual_screen[1]}.")
+    frame_reports = []
+    frame_timer = None
+
+    def write_frame_reports():
+        if frame_timer is not None:
+            frame_timer.stop()
+            frame_reports.append(dict(frame_timer.summary(), trial=trial_number))
+        with open(frames_filename, "w") as f:
+            json.dump({
+                "refresh_rate": config.get("refresh_rate"),
+                "screen_size": config.get("screen_size"),
+                "actual_screen_size": list(actual_screen),
+                "trials": frame_reports,
+            }, f, indent=2)
+
+    # Per-trial state, replaced by show_trial()
+    trial_number = 0
+    placed_items = {}  # placement order -> dict: { cid, symbol, is_target, x, y, w, h, ... }
+    items_by_position = None  # same keys, by item centre
+    targets_by_position = None  # remaining targets only
+    onset_time = None
+    prev_click_time = None
+    raster = None  # raster_render.RasterStimulus in raster mode
+    draw_start = None
+    handler_delays = []  # handler entry -> log() returned, in ms
+    event_clock_offset = None  # smallest (perf_counter ms - event.time) seen, mod 2**32
+
+    def show_trial():
+        nonlocal trial_number, placed_items, items_by_position, targets_by_position
+        nonlocal onset_time, prev_click_time, raster, draw_start
+        wait_start = time.perf_counter()
+        try:
+            trial_number, trial_config, records, report = scheduler.next_trial()
+        except (OSError, ValueError) as e:  # e.g. a layout_file removed or damaged since validation
+            from tkinter import messagebox
+            messagebox.showerror("Cannot show trial",
+                                 f"The layout for trial {scheduler.next_index} could not be loaded:\n{e}")
+            on_closing()
+            return
+        profile.add_phase("wait_layout", wait_start, time.perf_counter(), trial=trial_number)
+        glyph_metrics_cache.save()
+        if profile.enabled:
+            build = report.pop("profile", {})
+            placement_stats = build.get("placement") or {}
+            profile.count("placement_retries", placement_stats.get("retries", 0))
+            profile.count("placement_failures", placement_stats.get("failures", 0))
+            profile_trials.append(dict(build, trial=trial_number))
+
+        placement_reports.append(report)
+        if report.get("canvas_width", c_width) != c_width or report.get("canvas_height", c_height) != c_height:
+            print(f"Warning: trial {trial_number}: layout was made for a "
+                  f"{report['canvas_width']}x{report['canvas_height']} canvas, "
+                  f"this one is {c_width}x{c_height}.")
+        if not report["complete"]:
+            print(f"Warning: trial {trial_number}: placed "
+                  f"{report['targets_placed']}/{report['targets_requested']} targets "
+                  f"and {report['distractors_placed']}/{report['distractors_requested']} distractors "
+                  f"(see {report_filename}).")
+
+        render_mode = trial_config.get("render_mode", raster_render.RENDER_VECTOR)
+        if render_mode == raster_render.RENDER_RASTER and not raster_render.available():
+            print("Warning: raster rendering needs Pillow; drawing this trial as vector text.")
+            render_mode = raster_render.RENDER_VECTOR
+        report["render"] = {"mode": render_mode, "items": len(records)}
+
+        draw_start = time.perf_counter()
+        profile.count("items_drawn", len(records))
+        task_canvas.delete("all")
+        placed_items = {}
+        items_by_position = item_index.ItemIndex(cell_size=min_dist)
+        targets_by_position = item_index.ItemIndex(cell_size=min_dist)
+        raster = None
+        if render_mode == raster_render.RENDER_RASTER:
+            raster = raster_render.RasterStimulus(c_width, c_height, bg=task_canvas["bg"],
+                                                  px_per_point=float(root.tk.call("tk", "scaling")))
+            raster.render(records)
+            task_canvas.create_image(0, 0, image=raster.to_photo(task_canvas), anchor="nw")
+        for rec in records:
+            itm = dict(rec)
+            if raster is None:
+                ft = build_font(rec["font"], rec["size"], rec["bold"], rec["italic"], rec["underline"])
+                itm["cid"] = task_canvas.create_text(rec["x"], rec["y"],
+                                                     text=rec["symbol"],
+                                                     font=ft,
+                                                     fill=rec["color"],
+                                                     anchor="nw")
+            key = len(placed_items)
+            placed_items[key] = itm
+            items_by_position.insert(key, rec["x"] + rec["w"]/2, rec["y"] + rec["h"]/2)
+            if rec["is_target"]:
+                targets_by_position.insert(key, rec["x"] + rec["w"]/2, rec["y"] + rec["h"]/2)
+        profile.add_phase("draw_items", draw_start, time.perf_counter(), trial=trial_number)
+
+        # Stimulus onset: the canvas redraws in an idle callback queued by the
+        # create_text calls above, and idle callbacks run in order, so this one
+        # runs once the first frame has actually been drawn.
+        onset_time = None
+        prev_click_time = None
+        task_canvas.after_idle(mark_onset)
+
+    def mark_onset():
+        nonlocal onset_time, frame_timer
+        task_canvas.update_idletasks()
+        onset_time = time.perf_counter()
+
+        profile.add_phase("onset", draw_start, onset_time, trial=trial_number)
+        if trial_number == 1:
+            # what a participant waits for: Run pressed -> first display drawn
+            profile.add_phase("time_to_first_onset", profile.origin, onset_time)
+        write_profile()
+
+        render = placement_reports[-1]["render"]
+        render["draw_ms"] = round((onset_time - draw_start) * 1000, 3)
+        if raster is not None:
+            render["composite_ms"] = round(raster.composite_seconds * 1000, 3)
+            render["pixel_memory_bytes"] = raster.memory_bytes()
+        else:
+            render["canvas_items"] = len(placed_items)
+        with open(report_filename, "w") as f:
+            json.dump({"trials": placement_reports}, f, indent=2)
+
+        # only now start on the next layout, so it never delays this frame,
+        # and only then the frame heartbeat, so neither this bookkeeping nor
+        # submitting the prefetch counts as a late frame (see frame_timing.py)
+        scheduler.prefetch()
+        frame_timer = frame_timing.FrameTimer(task_canvas, refresh_hz,
+                                              prefetch_overlaps=scheduler.prefetch_overlaps)
+        frame_timer.start(onset_time, draw_start)
+
+    def end_trial():
+        nonlocal placed_items, frame_timer
+        write_frame_reports()
+        frame_timer = None
+        placed_items = {}  # ignore clicks during the inter-trial interval
+        task_canvas.delete("all")
+        root.after(INTER_TRIAL_INTERVAL_MS, show_trial)
 
     # 6) On click: find nearest letter, log CSV row, remove that letter
     def on_click(event):
+        nonlocal prev_click_time, event_clock_offset
+        handler_start = time.perf_counter()
         if not placed_items:
             return
         click_x, click_y = event.x, event.y
 
-        # Find nearest letter
-        min_dist_sel = float("inf")
-        nearest_item = None
-        for itm in placed_items:
-            # center of that item
-            cx = itm["x"] + itm["w"]/2
-            cy = itm["y"] + itm["h"]/2
-            dist = math.hypot(click_x - cx, click_y - cy)
-            if dist < min_dist_sel:
-                min_dist_sel = dist
-                nearest_item = itm
+        # Find nearest letter (grid search outward from the click)
+        nearest_key, min_dist_sel = items_by_position.nearest(click_x, click_y)
+        nearest_item = placed_items.get(nearest_key)
 
         if nearest_item is not None:
-            # Now find distance from that item to the nearest target
-            min_target_dist = float("inf")
+            # Now find distance from that item to the nearest remaining target
+            # (0 if it is a target itself, inf once all targets are gone)
             cx_item = nearest_item["x"] + nearest_item["w"]/2
             cy_item = nearest_item["y"] + nearest_item["h"]/2
-            for itm2 in placed_items:
-                if itm2["is_target"]:
-                    # center of itm2
-                    cx_t = itm2["x"] + itm2["w"]/2
-                    cy_t = itm2["y"] + itm2["h"]/2
-                    dist_t = math.hypot(cx_item - cx_t, cy_item - cy_t)
-                    if dist_t < min_target_dist:
-                        min_target_dist = dist_t
-
-            # Write a row to CSV using the 8 columns from your snippet
+            _, min_target_dist = targets_by_position.nearest(cx_item, cy_item)
+
+            # Queue a row for the CSV writer thread using the 8 columns from your snippet
             # "ClickX","ClickY","NearestLetterChar","NearestLetterType",
             # "LetterCenterX","LetterCenterY","DistanceToSelection","DistanceToNearestTarget"
             letter_type_str = "target" if nearest_item["is_target"] else "distractor"
-            writer.writerow([
+            since_onset = "" if onset_time is None else round((handler_start - onset_time) * 1000, 3)
+            since_prev = "" if prev_click_time is None else round((handler_start - prev_click_time) * 1000, 3)
+            prev_click_time = handler_start
+            # event.time is a 32-bit millisecond clock with its own epoch
+            clock_diff = (handler_start * 1000 - event.time) % 2**32
+            if event_clock_offset is None or clock_diff < event_clock_offset:
+                event_clock_offset = clock_diff
+            dispatch_delay = round(clock_diff - event_clock_offset, 3)
+            response_logger.log([
                 click_x,
                 click_y,
                 nearest_item["symbol"],
@@ -687,50 +1060,89 @@ def start_task(config):
                 cx_item,
                 cy_item,
                 min_dist_sel,
-                min_target_dist
-            ])
-            # Remove from canvas, remove from placed_items
-            task_canvas.delete(nearest_item["cid"])
-            placed_items.remove(nearest_item)
-
-    task_canvas.bind("<Button-1>", on_click)
-
-    # 7) On closing the window, close CSV
+                min_target_dist,
+                round(handler_start * 1000, 3),
+                event.time,
+                since_onset,
+                since_prev,
+                None,  # HandlerDelayMs, stamped by log()
+                dispatch_delay,
+                trial_number
+            ], stamp=(handler_delay_column, handler_start))
+            handler_delays.append((time.perf_counter() - handler_start) * 1000)
+            # Remove from canvas (or erase it from the raster), from placed_items and the index
+            if raster is not None:
+                raster.erase(nearest_key)  # keys are the records' indices
+            else:
+                task_canvas.delete(nearest_item["cid"])
+            del placed_items[nearest_key]
+            items_by_position.remove(nearest_key)
+            if nearest_key in targets_by_position:
+                targets_by_position.remove(nearest_key)
+
+            # Trial over once all targets are found (or everything, if there were none)
+            trial_done = (len(targets_by_position) == 0 and
+                          (nearest_item["is_target"] or not placed_items))
+            if trial_done and scheduler.has_next():
+                end_trial()
+
+    with profile.phase("bind"):
+        task_canvas.bind("<Button-1>", on_click)
+
+    # 7) On closing the window, drain the log queue, fsync and close the CSV
     def on_closing():
-        csv_file.close()
-        root.destroy()
-
+        try:
+            write_frame_reports()
+            scheduler.shutdown()
+            try:
+                response_logger.close()
+            except Exception as e:  # raised by the writer thread
+                from tkinter import messagebox
+                stats = response_logger.stats()
+                messagebox.showerror(
+                    "Responses not saved",
+                    f"Writing the responses to {response_logger.filename} failed:\n{e}\n\n"
+                    f"{stats['rows_written']} rows were written before the error."
+                )
+                return
+            stats = response_logger.stats()
+            print(f"Logged {stats['rows_written']} rows in {stats['flushes']} flushes "
+                  f"(max queue depth {stats['max_queue_depth']}, "
+                  f"mean write latency {stats['mean_write_latency_ms']:.2f} ms, "
+                  f"max {stats['max_write_latency_ms']:.2f} ms).")
+            if handler_delays:
+                print(f"Click handler delay: mean {sum(handler_delays) / len(handler_delays):.3f} ms, "
+                      f"max {max(handler_delays):.3f} ms over {len(handler_delays)} clicks.")
+            if profile.enabled:
+                profile.count("clicks", len(handler_delays))
+                write_profile()
+                prof_file = profile.stop_cprofile(csv_stem + "_profile.prof")
+                print(f"Session profile written to {profile_filename}"
+                      + (f" (cProfile: {prof_file})" if prof_file else "") + ".")
+        finally:
+            root.destroy()
+
+    # registered before the first trial, so a failing one still closes the log
     root.protocol("WM_DELETE_WINDOW", on_closing)
+    show_trial()
 
 ############################################
 # Validate & Run
 ############################################
 def validate_and_run():
     global debounce_id
-    if not study_id_entry.get().strip() or not session_entry.get().strip() or not admin_entry.get().strip():
-        error_label.config(text="Error: Fill out Study ID, Session #, and Administrator.")
+    # Same rules as the command-line batch mode (validation.py)
+    config = get_configuration()
+    error = validation.validate_configuration(config)
+    if error:
+        error_label.config(text=error)
     else:
-        total_val = safe_get_int_from_stringvar(total_items_var, 0)
-        if total_val <= 0:
-            error_label.config(text="Error: 'Number of items total' invalid or blank.")
-            return
-        t_sum = sum(v.get() for v in target_quantity_vars)
-        d_sum = sum(v.get() for v in distractor_quantity_vars)
-        if t_sum + d_sum != total_val:
-            error_label.config(text="Error: sum of target + distractor must equal total items.")
-        else:
-            error_label.config(text="")
-            # Cancel pending debounce so it doesn't fire after UI is destroyed
-            if debounce_id is not None:
-                root.after_cancel(debounce_id)
-            # Now start the actual task
-            config = get_configuration()
-            start_task(config)
-
-run_btn = ttk.Button(bottom_btns_frame, text="\u25B6 RUN TASK", command=validate_and_run)
-run_btn.config(width=50)
-run_btn.grid(row=0, column=2, padx=5, pady=5)
-run_btn.state(["disabled"])
+        error_label.config(text="")
+        # Cancel pending debounce so it doesn't fire after UI is destroyed
+        if debounce_id is not None:
+            root.after_cancel(debounce_id)
+        # Now start the actual task
+        start_task(config)
 
 ###################################
 # CREATE/REMOVE TARGETS & DISTRACTORS
@@ -739,174 +1151,200 @@ def turn_off_auto_distr(*args):
     global distr_auto_enabled
     distr_auto_enabled = False
 
-def add_target():
-    if len(target_symbol_vars) >= MAX_TARGET_ROWS:
-        messagebox.showwarning("Limit Reached", f"Maximum of {MAX_TARGET_ROWS} target rows allowed.")
-        return
-    target_symbol_vars.append(tk.StringVar(value=""))
-    font_var_vars.append(tk.StringVar(value="Arial"))
-    text_size_vars.append(tk.IntVar(value=18))
-    bold_vars.append(tk.BooleanVar())
-    underline_vars.append(tk.BooleanVar())
-    italic_vars.append(tk.BooleanVar())
-    text_color_vars.append(tk.StringVar(value="#000000"))
-    target_quantity_vars.append(tk.IntVar(value=1))
-    refresh_targets_frame()
-    schedule_debounced_update()
-
-def remove_target(i):
-    del target_symbol_vars[i]
-    del font_var_vars[i]
-    del text_size_vars[i]
-    del bold_vars[i]
-    del underline_vars[i]
-    del italic_vars[i]
-    del text_color_vars[i]
-    del target_quantity_vars[i]
-    refresh_targets_frame()
-    schedule_debounced_update()
-
-def refresh_targets_frame():
-    for w in targets_frame.winfo_children():
-        w.destroy()
-    for i in range(len(target_symbol_vars)):
-        create_target_entry(i)
-    btn = ttk.Button(targets_frame, text="Add Another Target", command=add_target)
-    btn.grid(row=999, column=0, columnspan=11, pady=10, sticky="w")
-
-def create_target_entry(i):
-    row = i
-    e_symbol = ttk.Entry(targets_frame, textvariable=target_symbol_vars[i], width=3)
-    e_symbol.grid(row=row, column=0, padx=5, sticky="w")
-
-    cb_font = ttk.Combobox(
-        targets_frame,
-        textvariable=font_var_vars[i],
-        values=FONT_OPTIONS,
-        state="readonly"
-    )
-    cb_font.grid(row=row, column=1, padx=5, sticky="w")
-
-    lbl_size = ttk.Label(targets_frame, text="Size:")
-    lbl_size.grid(row=row, column=2, padx=2, sticky="w")
-
-    sbox_size = tk.Spinbox(targets_frame, from_=1, to=999, textvariable=text_size_vars[i], width=5)
-    sbox_size.grid(row=row, column=3, padx=5, sticky="w")
+def read_row_var(field, var):
+    if field == "size":
+        return safe_get_int(var, 18)
+    if field == "quantity":
+        return safe_get_int(var, 0)
+    if field in ("bold", "underline", "italic"):
+        return bool(var.get())
+    return var.get()
 
-    ttk.Checkbutton(targets_frame, text="Bold", variable=bold_vars[i]).grid(row=row, column=4, sticky="w")
-    ttk.Checkbutton(targets_frame, text="Underline", variable=underline_vars[i]).grid(row=row, column=5, sticky="w")
-    ttk.Checkbutton(targets_frame, text="Italic", variable=italic_vars[i]).grid(row=row, column=6, sticky="w")
-
-    color_btn = ttk.Button(targets_frame, text="Text color", command=lambda idx=i: choose_color(idx, "targets"))
-    color_btn.grid(row=row, column=7, padx=5, sticky="w")
+def bind_row_vars(table, row):
+    """
+    Create the Tk variables behind a row's widgets. Each one gets a single
+    trace that copies its value into the row model; unbind_row_vars removes
+    them again when the row goes away.
+    """
+    ui = {
+        "symbol": tk.StringVar(value=row.symbol),
+        "font": tk.StringVar(value=row.font),
+        "size": tk.IntVar(value=row.size),
+        "bold": tk.BooleanVar(value=row.bold),
+        "underline": tk.BooleanVar(value=row.underline),
+        "italic": tk.BooleanVar(value=row.italic),
+        "color": tk.StringVar(value=row.color),
+        "quantity": tk.IntVar(value=row.quantity),
+    }
+    traces = []
+    for field, var in ui.items():
+        trace_id = var.trace_add("write", lambda *_, f=field, v=var: table.set(row, f, read_row_var(f, v)))
+        traces.append((var, trace_id))
+    ui["traces"] = traces
+    row.ui = ui
+
+def unbind_row_vars(row):
+    """
+    Remove the traces bind_row_vars added. Each trace's callback holds the
+    row, so until then neither the row nor its Tk variables can be freed.
+    """
+    for var, trace_id in row.ui.pop("traces"):
+        var.trace_remove("write", trace_id)
+    row.ui = None
+
+# (widget, padx, sticky) for each column of a target/distractor row
+ROW_GRID_LAYOUT = [
+    ("e_symbol", 5, "w"),
+    ("cb_font", 5, "w"),
+    ("lbl_size", 2, "w"),
+    ("sbox_size", 5, "w"),
+    ("cb_bold", 0, "w"),
+    ("cb_underline", 0, "w"),
+    ("cb_italic", 0, "w"),
+    ("color_btn", 5, "w"),
+    ("remove_btn", 5, "w"),
+    ("q_lbl", 5, "e"),
+    ("q_spin", 5, "w"),
+]
+
+class RowPanel:
+    """
+    The widgets of the Targets or Distractors panel.
 
-    remove_btn = ttk.Button(targets_frame, text="Remove", command=lambda idx=i: remove_target(idx))
-    remove_btn.grid(row=row, column=8, padx=5, sticky="w")
+    Each row owns one set of 11 widgets. Adding a row grids one set at the
+    bottom; removing a row hides only its set and keeps it in a pool, and
+    the next added row reuses it by pointing its widgets at the new row's
+    variables. Other rows are never rebuilt; only their "# Target n:"
+    labels are renumbered after a removal.
+    """
 
-    q_lbl = ttk.Label(targets_frame, text=f"# Target {i+1}:")
-    q_lbl.grid(row=row, column=9, padx=5, sticky="e")
+    def __init__(self, frame, table, kind, max_rows, on_quantity_spin=None):
+        self.frame = frame
+        self.table = table
+        self.kind = kind  # "Target" or "Distractor"
+        self.max_rows = max_rows
+        self.on_quantity_spin = on_quantity_spin
+        self.widgets = {}  # row -> widget dict
+        self.pool = []     # hidden widget dicts ready for reuse
+        self.next_grid_row = 0
+        self.add_button = ttk.Button(frame, text=f"Add Another {kind}", command=self.add_row)
+        self.add_button.grid(row=0, column=0, columnspan=11, pady=10, sticky="w")
+
+    def add_row(self):
+        if len(self.table) >= self.max_rows:
+            from tkinter import messagebox
+            messagebox.showwarning("Limit Reached", f"Maximum of {self.max_rows} {self.kind.lower()} rows allowed.")
+            return None
+        row = self.table.add()
+        bind_row_vars(self.table, row)
+        w = self.pool.pop() if self.pool else self._create_widgets()
+        self._attach(w, row, len(self.table))
+        self.widgets[row] = w
+
+        grid_row = self.next_grid_row
+        self.next_grid_row += 1
+        for col, (widget, (name, padx, sticky)) in enumerate(zip(w["order"], ROW_GRID_LAYOUT)):
+            widget.grid(row=grid_row, column=col, padx=padx, sticky=sticky)
+        self.add_button.grid(row=self.next_grid_row)
+        return row
+
+    def load(self, rows):
+        """
+        Replace every row with rows (dicts of ROW_FIELDS values, as checked by
+        validation.normalize_configuration) in one batch. Rows past max_rows
+        are dropped; returns a note saying so, or None.
+        """
+        note = None
+        if len(rows) > self.max_rows:
+            note = (f"Note: only the first {self.max_rows} of {len(rows)} "
+                    f"{self.kind.lower()} rows were loaded.")
+            rows = rows[:self.max_rows]
+        with self.table.batch():
+            for row, w in self.widgets.items():
+                unbind_row_vars(row)
+                for widget in w["order"]:
+                    widget.grid_remove()
+                self.pool.append(w)
+            self.widgets = {}
+            self.table.clear()
+            for grid_row, fields in enumerate(rows):
+                row = self.table.add(**{f: fields[f] for f in row_model.ROW_FIELDS if f in fields})
+                bind_row_vars(self.table, row)
+                w = self.pool.pop() if self.pool else self._create_widgets()
+                self._attach(w, row, grid_row + 1)
+                self.widgets[row] = w
+                for col, (widget, (name, padx, sticky)) in enumerate(zip(w["order"], ROW_GRID_LAYOUT)):
+                    widget.grid(row=grid_row, column=col, padx=padx, sticky=sticky)
+        self.next_grid_row = len(rows)
+        self.add_button.grid(row=self.next_grid_row)
+        return note
+
+    def remove_row(self, row):
+        index = self.table.index(row)
+        self.table.remove(row)
+        unbind_row_vars(row)
+        w = self.widgets.pop(row)
+        for widget in w["order"]:
+            widget.grid_remove()
+        self.pool.append(w)
+        for i in range(index, len(self.table)):
+            self.widgets[self.table[i]]["q_lbl"].config(text=f"# {self.kind} {i+1}:")
+
+    def _create_widgets(self):
+        f = self.frame
+        w = {
+            "e_symbol": ttk.Entry(f, width=3),
+            "cb_font": ttk.Combobox(f, values=FONT_OPTIONS, state="readonly"),
+            "lbl_size": ttk.Label(f, text="Size:"),
+            "sbox_size": tk.Spinbox(f, from_=1, to=999, width=5),
+            "cb_bold": ttk.Checkbutton(f, text="Bold"),
+            "cb_underline": ttk.Checkbutton(f, text="Underline"),
+            "cb_italic": ttk.Checkbutton(f, text="Italic"),
+            "color_btn": ttk.Button(f, text="Text color"),
+            "remove_btn": ttk.Button(f, text="Remove"),
+            "q_lbl": ttk.Label(f),
+            "q_spin": tk.Spinbox(f, from_=1, to=9999, width=5),
+        }
+        w["order"] = [w[name] for (name, padx, sticky) in ROW_GRID_LAYOUT]
+        if self.on_quantity_spin is not None:
+            w["q_spin"].config(command=self.on_quantity_spin)
+        return w
+
+    def _attach(self, w, row, number):
+        ui = row.ui
+        w["e_symbol"].config(textvariable=ui["symbol"])
+        w["cb_font"].config(textvariable=ui["font"])
+        w["sbox_size"].config(textvariable=ui["size"])
+        w["cb_bold"].config(variable=ui["bold"])
+        w["cb_underline"].config(variable=ui["underline"])
+        w["cb_italic"].config(variable=ui["italic"])
+        w["color_btn"].config(command=lambda r=row: choose_color(r))
+        w["remove_btn"].config(command=lambda r=row: self.remove_row(r))
+        w["q_lbl"].config(text=f"# {self.kind} {number}:")
+        w["q_spin"].config(textvariable=ui["quantity"])
+
+def disable_auto_and_update():
+    global distr_auto_enabled
+    distr_auto_enabled = False
+    schedule_debounced_update()
 
-    q_spin = tk.Spinbox(targets_frame, from_=1, to=9999, textvariable=target_quantity_vars[i], width=5)
-    q_spin.grid(row=row, column=10, padx=5, sticky="w")
+def build_row_panels():
+    global target_panel, distractor_panel
+    target_panel = RowPanel(targets_frame, target_rows, "Target", MAX_TARGET_ROWS)
+    distractor_panel = RowPanel(distractors_frame, distractor_rows, "Distractor", MAX_DISTRACTOR_ROWS,
+                                on_quantity_spin=disable_auto_and_update)
 
-    e_symbol.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-    cb_font.bind("<<ComboboxSelected>>", lambda e: schedule_debounced_update())
-    sbox_size.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-    q_spin.bind("<KeyRelease>", lambda e: schedule_debounced_update())
+def add_target():
+    return target_panel.add_row()
 
-    for var in (bold_vars[i], underline_vars[i], italic_vars[i], target_quantity_vars[i]):
-        var.trace_add("write", lambda *_: schedule_debounced_update())
+def remove_target(i):
+    target_panel.remove_row(target_rows[i])
 
 def add_distractor():
-    if len(distractor_symbol_vars) >= MAX_DISTRACTOR_ROWS:
-        messagebox.showwarning("Limit Reached", f"Maximum of {MAX_DISTRACTOR_ROWS} distractor rows allowed.")
-        return
-    distractor_symbol_vars.append(tk.StringVar(value=""))
-    distractor_font_var_vars.append(tk.StringVar(value="Arial"))
-    distractor_text_size_vars.append(tk.IntVar(value=18))
-    distractor_bold_vars.append(tk.BooleanVar())
-    distractor_underline_vars.append(tk.BooleanVar())
-    distractor_italic_vars.append(tk.BooleanVar())
-    distractor_text_color_vars.append(tk.StringVar(value="#000000"))
-    distractor_quantity_vars.append(tk.IntVar(value=1))
-    refresh_distractors_frame()
-    schedule_debounced_update()
+    return distractor_panel.add_row()
 
 def remove_distractor(i):
-    del distractor_symbol_vars[i]
-    del distractor_font_var_vars[i]
-    del distractor_text_size_vars[i]
-    del distractor_bold_vars[i]
-    del distractor_underline_vars[i]
-    del distractor_italic_vars[i]
-    del distractor_text_color_vars[i]
-    del distractor_quantity_vars[i]
-    refresh_distractors_frame()
-    schedule_debounced_update()
-
-def refresh_distractors_frame():
-    for w in distractors_frame.winfo_children():
-        w.destroy()
-    for i in range(len(distractor_symbol_vars)):
-        create_distractor_entry(i)
-    btn = ttk.Button(distractors_frame, text="Add Another Distractor", command=add_distractor)
-    btn.grid(row=999, column=0, columnspan=11, pady=10, sticky="w")
-
-def create_distractor_entry(i):
-    row = i
-    e_symbol = ttk.Entry(distractors_frame, textvariable=distractor_symbol_vars[i], width=3)
-    e_symbol.grid(row=row, column=0, padx=5, sticky="w")
-
-    cb_font = ttk.Combobox(
-        distractors_frame,
-        textvariable=distractor_font_var_vars[i],
-        values=FONT_OPTIONS,
-        state="readonly"
-    )
-    cb_font.grid(row=row, column=1, padx=5, sticky="w")
-
-    lbl_size = ttk.Label(distractors_frame, text="Size:")
-    lbl_size.grid(row=row, column=2, padx=2, sticky="w")
-
-    sbox_size = tk.Spinbox(distractors_frame, from_=1, to=999, textvariable=distractor_text_size_vars[i], width=5)
-    sbox_size.grid(row=row, column=3, padx=5, sticky="w")
-
-    ttk.Checkbutton(distractors_frame, text="Bold", variable=distractor_bold_vars[i]).grid(row=row, column=4, sticky="w")
-    ttk.Checkbutton(distractors_frame, text="Underline", variable=distractor_underline_vars[i]).grid(row=row, column=5, sticky="w")
-    ttk.Checkbutton(distractors_frame, text="Italic", variable=distractor_italic_vars[i]).grid(row=row, column=6, sticky="w")
-
-    color_btn = ttk.Button(distractors_frame, text="Text color",
-                           command=lambda idx=i: choose_color(idx, "distractors"))
-    color_btn.grid(row=row, column=7, padx=5, sticky="w")
-
-    remove_btn = ttk.Button(distractors_frame, text="Remove",
-                            command=lambda idx=i: remove_distractor(idx))
-    remove_btn.grid(row=row, column=8, padx=5, sticky="w")
-
-    q_lbl = ttk.Label(distractors_frame, text=f"# Distractor {i+1}:")
-    q_lbl.grid(row=row, column=9, padx=5, sticky="e")
-
-    q_spin = tk.Spinbox(distractors_frame, from_=1, to=9999, textvariable=distractor_quantity_vars[i], width=5)
-    q_spin.grid(row=row, column=10, padx=5, sticky="w")
-
-    def disable_auto_and_update():
-        global distr_auto_enabled
-        distr_auto_enabled = False
-        schedule_debounced_update()
-
-    q_spin.config(command=disable_auto_and_update)
-
-    e_symbol.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-    cb_font.bind("<<ComboboxSelected>>", lambda e: schedule_debounced_update())
-    sbox_size.bind("<KeyRelease>", lambda e: schedule_debounced_update())
-
-    for var in (
-        distractor_bold_vars[i],
-        distractor_underline_vars[i],
-        distractor_italic_vars[i],
-        distractor_quantity_vars[i]
-    ):
-        var.trace_add("write", lambda *_: schedule_debounced_update())
+    distractor_panel.remove_row(distractor_rows[i])
 
 
 ###################################
@@ -916,6 +1354,46 @@ def initialize():
     add_target()
     add_distractor()
 
-initialize()
+###################################
+# Application
+###################################
+def report_cold_start(event):
+    """
+    Runs when the main window is first mapped: reports the time from launch
+    (LAUNCH_TIME, before the heavier imports) to the window being shown.
+    """
+    if event.widget is not root:
+        return
+    root.unbind("<Map>")
+    shown = time.perf_counter()
+    ui_profile.add_phase("cold_start", LAUNCH_TIME, shown)
+    print(f"Window shown {(shown - LAUNCH_TIME) * 1000:.0f} ms after launch.")
 
-root.mainloop()
\ No newline at end of file
+def create_app():
+    """
+    Build the setup window and return its root. Importing this module builds
+    nothing; the Advanced Settings widgets and the file/colour dialogs are
+    only created (and imported) when first used.
+    """
+    build_start = time.perf_counter()
+    ui_profile.add_phase("imports", LAUNCH_TIME, build_start)
+    build_window()
+    build_columns()
+    build_settings_vars()
+    build_left_column()
+    build_preview()
+    build_bottom_buttons()
+    build_row_panels()
+    initialize()
+    ui_profile.add_phase("build_ui", build_start, time.perf_counter())
+    root.bind("<Map>", report_cold_start)
+    return root
+
+def main():
+    # the layout prefetch runs in a worker process (see trials.py)
+    import multiprocessing
+    multiprocessing.freeze_support()
+    create_app().mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Study-level summary of the response CSVs written by start_task.
+
+    python analytics.py data/ --out study_summary.csv
+
+finds every responses_<study>_session<n>_<timestamp>.csv under the given
+files/directories, summarizes each session in a process pool and writes one
+row per session to the output CSV:
+
+    clicks, trials, targets_found, false_clicks (clicks nearest a distractor),
+    search_path_length (summed distance between consecutive clicks within a
+    trial), mean_inter_click_distance, mean_distance_to_nearest_target
+    (finite values only; it is inf once a trial's targets are all found)
+
+Each file is streamed row by row, so memory does not grow with file size,
+and only the small per-session summaries come back from the workers.
+Summaries are kept in a state file next to the output together with each
+CSV's mtime and size; a later run only reads files that are new or changed.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+
+STATE_VERSION = 1
+SESSION_FILE_PATTERN = "responses_*.csv"
+SESSION_FILE_RE = re.compile(
+    r"^responses_(?P<study_id>.*)_session(?P<session>.*)_(?P<timestamp>\d{8}-\d{6})\.csv$"
+)
+
+SUMMARY_COLUMNS = [
+    "file", "study_id", "session", "timestamp",
+    "clicks", "trials", "targets_found", "false_clicks",
+    "search_path_length", "mean_inter_click_distance", "mean_distance_to_nearest_target",
+]
+
+
+def find_session_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "**", SESSION_FILE_PATTERN), recursive=True))
+        else:
+            files.append(path)
+    return sorted(set(os.path.abspath(f) for f in files))
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+###################################
+# Per-session summary (worker)
+###################################
+def summarize_session(path):
+    """
+    Stream one response CSV and return its summary row as a dict.
+    """
+    match = SESSION_FILE_RE.match(os.path.basename(path))
+    summary = {
+        "file": path,
+        "study_id": match.group("study_id") if match else "",
+        "session": match.group("session") if match else "",
+        "timestamp": match.group("timestamp") if match else "",
+    }
+    clicks = targets = 0
+    path_length = 0.0
+    steps = 0
+    target_dist_sum = 0.0
+    target_dist_count = 0
+    trials_seen = set()
+    prev_trial = prev_x = prev_y = None
+
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        col = {name: i for i, name in enumerate(header)}
+        i_x, i_y = col["ClickX"], col["ClickY"]
+        i_type = col["NearestLetterType"]
+        i_dist = col["DistanceToNearestTarget"]
+        i_trial = col.get("Trial")  # sessions from before multi-trial blocks have one trial
+        for row in reader:
+            if len(row) < len(header):
+                continue  # a row cut short by a crash
+            clicks += 1
+            if row[i_type] == "target":
+                targets += 1
+            dist = parse_float(row[i_dist])
+            if dist is not None and math.isfinite(dist):
+                target_dist_sum += dist
+                target_dist_count += 1
+
+            trial = row[i_trial] if i_trial is not None else "1"
+            trials_seen.add(trial)
+            x, y = parse_float(row[i_x]), parse_float(row[i_y])
+            if trial == prev_trial and prev_x is not None and x is not None:
+                path_length += math.hypot(x - prev_x, y - prev_y)
+                steps += 1
+            prev_trial, prev_x, prev_y = trial, x, y
+
+    summary.update({
+        "clicks": clicks,
+        "trials": len(trials_seen),
+        "targets_found": targets,
+        "false_clicks": clicks - targets,
+        "search_path_length": round(path_length, 3),
+        "mean_inter_click_distance": round(path_length / steps, 3) if steps else "",
+        "mean_distance_to_nearest_target": (round(target_dist_sum / target_dist_count, 3)
+                                            if target_dist_count else ""),
+    })
+    return summary
+
+
+###################################
+# Incremental state
+###################################
+def load_state(path):
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != STATE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_state(path, files):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": STATE_VERSION, "files": files}, f)
+    os.replace(tmp_path, path)
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+###################################
+# Study table
+###################################
+def run_analysis(paths, out, state_path=None, workers=None):
+    """
+    Summarize the session files under paths into the CSV out. Returns
+    (summaries, counts) with counts of files read, skipped and failed; a
+    file that is missing or cannot be read counts as failed.
+    """
+    state_path = state_path or os.path.splitext(out)[0] + "_state.json"
+    state = load_state(state_path)
+    files = find_session_files(paths)
+
+    todo = []
+    new_state = {}
+    failed = 0
+    for path in files:
+        try:
+            signature = file_signature(path)
+        except OSError as e:
+            print(f"Warning: {path}: cannot read ({e.strerror or e}).")
+            failed += 1
+            continue
+        cached = state.get(path)
+        if cached is not None and cached["signature"] == signature:
+            new_state[path] = cached
+        else:
+            todo.append((path, signature))
+
+    unchanged = len(files) - len(todo) - failed
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(path, signature, pool.submit(summarize_session, path)) for (path, signature) in todo]
+            for (path, signature, future) in futures:
+                try:
+                    new_state[path] = {"signature": signature, "summary": future.result()}
+                except (OSError, KeyError, UnicodeDecodeError, csv.Error) as e:
+                    print(f"Warning: {path}: not a readable response file ({e!r}).")
+                    failed += 1
+
+    summaries = sorted((entry["summary"] for entry in new_state.values()),
+                       key=lambda s: (s["study_id"], s["session"], s["timestamp"], s["file"]))
+    tmp_out = out + ".tmp"
+    with open(tmp_out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    os.replace(tmp_out, out)
+    save_state(state_path, new_state)
+    counts = {"files": len(files), "read": len(files) - unchanged - failed, "skipped": unchanged,
+              "failed": failed}
+    return summaries, counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="searchtask-analyze",
+        description="Summarize Search Task response CSVs into one study-level table."
+    )
+    parser.add_argument("paths", nargs="+", help="response CSV files or directories to search")
+    parser.add_argument("--out", default="study_summary.csv", help="summary CSV (default: study_summary.csv)")
+    parser.add_argument("--state", help="state file of processed files (default: <out>_state.json)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summaries, counts = run_analysis(args.paths, args.out, args.state, args.workers)
+    print(f"{len(summaries)} sessions in {args.out}: {counts['read']} files read, "
+          f"{counts['skipped']} unchanged, {counts['failed']} failed "
+          f"({time.perf_counter() - start:.2f} s).")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
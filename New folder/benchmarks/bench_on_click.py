@@ -0,0 +1,81 @@
+"""
+How on_click's nearest-item lookup scales with the number of items.
+
+Compares the old linear scan over placed_items with item_index.ItemIndex,
+clicking random points and removing the nearest item each time, as the
+task does. Run from the "New folder" directory:
+
+    python benchmarks/bench_on_click.py
+"""
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import item_index
+import layout
+
+CANVAS_W, CANVAS_H = 3840, 2160
+MIN_DIST = 20
+CLICKS = 200
+
+
+def make_centres(n, seed=0):
+    config = {
+        "targets": [],
+        "distractors": [{"symbol": "L", "font": "Arial", "size": 12, "bold": False,
+                         "italic": False, "underline": False, "color": "#000000",
+                         "quantity": n}],
+        "layout_algorithm": "poisson",
+    }
+    records, _ = layout.build_layout(config, CANVAS_W, CANVAS_H,
+                                     rng=random.Random(seed), min_dist=MIN_DIST)
+    return [(r["x"] + r["w"]/2, r["y"] + r["h"]/2) for r in records]
+
+
+def linear_clicks(centres, clicks):
+    items = list(enumerate(centres))
+    latencies = []
+    for (x, y) in clicks:
+        t0 = time.perf_counter()
+        best, best_dist = None, float("inf")
+        for itm in items:
+            dist = math.hypot(x - itm[1][0], y - itm[1][1])
+            if dist < best_dist:
+                best, best_dist = itm, dist
+        items.remove(best)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def indexed_clicks(centres, clicks):
+    index = item_index.ItemIndex(cell_size=MIN_DIST)
+    for key, (cx, cy) in enumerate(centres):
+        index.insert(key, cx, cy)
+    latencies = []
+    for (x, y) in clicks:
+        t0 = time.perf_counter()
+        key, _ = index.nearest(x, y)
+        index.remove(key)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'items':>7} {'linear median us':>17} {'indexed median us':>18} {'speedup':>8}")
+    for n in (100, 1000, 5000, 10000):
+        centres = make_centres(n)
+        clicks = [(rng.uniform(0, CANVAS_W), rng.uniform(0, CANVAS_H))
+                  for _ in range(min(CLICKS, len(centres)))]
+        lin = statistics.median(linear_clicks(centres, clicks)) * 1e6
+        idx = statistics.median(indexed_clicks(centres, clicks)) * 1e6
+        print(f"{len(centres):>7} {lin:>17.1f} {idx:>18.1f} {lin / idx:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
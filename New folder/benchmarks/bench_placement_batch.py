@@ -0,0 +1,72 @@
+"""
+Pure-Python random placement (placement.place_random) against the NumPy
+batch backend (placement_batch.place_batch) from 100 to 10,000 items.
+Both follow the same rule, so the table also shows how many items each
+placed and checks the min-distance guarantee of the batch layouts. Run
+from the "New folder" directory (needs NumPy):
+
+    python benchmarks/bench_placement_batch.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import layout
+import placement
+import placement_batch
+
+CANVAS_W, CANVAS_H = 3840, 2160
+MIN_DIST = 20
+SIZES = (100, 1000, 2500, 5000, 10000)
+REPEATS = 3
+
+
+def item_sizes(n):
+    row = {"symbol": "L", "font": "Arial", "size": 12, "bold": False,
+           "italic": False, "underline": False}
+    return [layout.estimate_text_bbox(row)] * n
+
+
+def best_time(fn, sizes):
+    best = None
+    for seed in range(REPEATS):
+        t0 = time.perf_counter()
+        positions = fn(sizes, CANVAS_W, CANVAS_H, min_dist=MIN_DIST,
+                       max_tries=placement.DEFAULT_MAX_TRIES, rng=random.Random(seed))
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, positions
+
+
+def check_min_dist(sizes, positions):
+    grid = placement.SpatialHash(MIN_DIST)
+    for (w, h), pos in zip(sizes, positions):
+        if pos is None:
+            continue
+        cx, cy = pos[0] + w / 2, pos[1] + h / 2
+        assert grid.is_clear(cx, cy, MIN_DIST), "batch layout broke the min distance"
+        grid.insert(cx, cy)
+
+
+def main():
+    if not placement_batch.available():
+        print("NumPy is not installed; nothing to compare.")
+        return
+    placement_batch.place_batch(item_sizes(10), 100, 100, MIN_DIST, 10, random.Random(0))  # warm up
+    print(f"{'items':>7} {'python ms':>10} {'placed':>7} {'numpy ms':>10} {'placed':>7} {'speedup':>8}")
+    for n in SIZES:
+        sizes = item_sizes(n)
+        py_t, py_pos = best_time(placement.place_random, sizes)
+        np_t, np_pos = best_time(placement_batch.place_batch, sizes)
+        check_min_dist(sizes, np_pos)
+        py_placed = sum(p is not None for p in py_pos)
+        np_placed = sum(p is not None for p in np_pos)
+        print(f"{n:>7} {py_t * 1000:>10.1f} {py_placed:>7} {np_t * 1000:>10.1f} {np_placed:>7} "
+              f"{py_t / np_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Benchmark suite for the task's hot paths, with regression thresholds.
+
+Cases:
+    placement_<algorithm>_<n>  layout.build_layout for n = 100, 1,000, 5,000 items
+    nearest_item_<n>           on_click's nearest-item lookup and removal (ItemIndex)
+    nearest_target_<n>         on_click's DistanceToNearestTarget lookup
+    csv_log_row                BufferedCSVLogger.log() cost on the UI thread, for on_click's row
+    csv_log_drain              rows logged until written and fsynced by close()
+    preview_full_redraw        update_preview_canvas() with the maximum rows, from empty
+    preview_one_edit           update_preview_canvas() after changing one row
+    cold_start                 a fresh interpreter importing the app until its window is shown
+
+Every case reports the median time of one operation in milliseconds. The
+preview and cold-start cases build the real GUI and are skipped without a
+display. Run
+from the "New folder" directory:
+
+    python benchmarks/run_benchmarks.py                    # compare to baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline  # record a new baseline
+
+Results are written to benchmarks/results.json. A case fails when its median
+is more than THRESHOLDS (default DEFAULT_THRESHOLD) times the baseline's;
+the exit status is 1 if any case fails. Baselines are machine specific, so
+benchmarks/baseline.json is not committed (it is in .gitignore): record one
+with --update-baseline on each machine the comparisons will run on, e.g.
+before starting on a change. Without a baseline nothing can be compared, and
+the exit status is EXIT_NO_BASELINE.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+import item_index
+import layout
+import placement
+import placement_batch
+import response_log
+
+from bench_on_click import CANVAS_W, CANVAS_H, MIN_DIST, make_centres, indexed_clicks
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, "results.json")
+EXIT_NO_BASELINE = 3
+
+PLACEMENT_SIZES = (100, 1000, 5000)
+LOOKUP_SIZES = (100, 1000, 5000)
+LOG_ROWS = 5000
+TARGET_PASSES = 20  # passes over the clicks per nearest_target sample
+
+# allowed slowdown against the baseline, as a ratio of medians
+DEFAULT_THRESHOLD = 1.5
+THRESHOLDS = {
+    # depend on the writer thread, the disk and Tk, so are noisier
+    "csv_log_row": 2.0,
+    "csv_log_drain": 2.0,
+    "preview_full_redraw": 2.0,
+    "preview_one_edit": 2.0,
+    "cold_start": 2.0,
+}
+
+COLD_START_RUNS = 5
+# Run in a fresh interpreter so nothing is imported yet; prints ms to the window being shown
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location("searchtask_app", sys.argv[1])
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+root = app.create_app()
+root.update()
+print((time.perf_counter() - start) * 1000)
+root.destroy()
+"""
+
+
+def median_ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+###################################
+# Cases
+###################################
+def bench_placement(results, skipped):
+    for algorithm in placement.LAYOUT_ALGORITHMS:
+        if algorithm == placement.LAYOUT_BATCH and not placement_batch.available():
+            skipped.extend(f"placement_{algorithm}_{n}" for n in PLACEMENT_SIZES)
+            continue
+        for n in PLACEMENT_SIZES:
+            config = {
+                "targets": [{"symbol": "T", "font": "Arial", "size": 12, "bold": False,
+                             "italic": False, "underline": False, "color": "#000000",
+                             "quantity": max(1, n // 100)}],
+                "distractors": [{"symbol": "L", "font": "Arial", "size": 12, "bold": False,
+                                 "italic": False, "underline": False, "color": "#000000",
+                                 "quantity": n - max(1, n // 100)}],
+                "layout_algorithm": algorithm,
+            }
+            rng = random.Random(n)
+            samples = timed(lambda: layout.build_layout(config, CANVAS_W, CANVAS_H, rng=rng,
+                                                        min_dist=MIN_DIST),
+                            repeats=3 if n >= 5000 or algorithm == placement.LAYOUT_POISSON else 7)
+            results[f"placement_{algorithm}_{n}"] = median_ms(samples)
+
+
+def bench_lookups(results):
+    # single lookups take microseconds, so each sample is a whole run of
+    # clicks divided by the number of clicks
+    rng = random.Random(1)
+    for n in LOOKUP_SIZES:
+        centres = make_centres(n)
+        clicks = [(rng.uniform(0, CANVAS_W), rng.uniform(0, CANVAS_H))
+                  for _ in range(min(200, len(centres)))]
+        samples = [sum(indexed_clicks(centres, clicks)) / len(clicks) for _ in range(9)]
+        results[f"nearest_item_{n}"] = median_ms(samples)
+
+        # as in start_task: a separate index over the targets, 1 in 100 items
+        targets = item_index.ItemIndex(cell_size=MIN_DIST)
+        for key, (cx, cy) in enumerate(centres[::100]):
+            targets.insert(key, cx, cy)
+
+        def target_clicks():
+            for _ in range(TARGET_PASSES):
+                for (x, y) in clicks:
+                    targets.nearest(x, y)
+
+        samples = [t / (TARGET_PASSES * len(clicks)) for t in timed(target_clicks, repeats=9)]
+        results[f"nearest_target_{n}"] = median_ms(samples)
+
+
+def bench_csv_log(results):
+    # a row as on_click builds it, with HandlerDelayMs stamped by log()
+    header = response_log.RESPONSE_COLUMNS
+    row = [812, 455, "T", "target", 815.5, 461.0, 6.519202405202649, 0.0,
+           1234567.891, 98765432, 4567.123, 890.456, None, 1.0, 1]
+    stamp_column = header.index("HandlerDelayMs")
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = response_log.BufferedCSVLogger(os.path.join(tmp, "bench.csv"), header)
+        samples = []
+        t_start = time.perf_counter()
+        for _ in range(LOG_ROWS):
+            t0 = time.perf_counter()
+            logger.log(list(row), stamp=(stamp_column, t0))
+            samples.append(time.perf_counter() - t0)
+        logger.close()
+        drain = time.perf_counter() - t_start
+    results["csv_log_row"] = median_ms(samples)
+    results["csv_log_drain"] = drain / LOG_ROWS * 1000
+
+
+def load_app():
+    """
+    Import SearchTask_v0.1.py and build its GUI (no event loop). None without a display.
+    """
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        return None
+    spec = importlib.util.spec_from_file_location("searchtask_app", os.path.join(APP_DIR, "SearchTask_v0.1.py"))
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    app.create_app()
+    return app
+
+
+def bench_preview(results, skipped):
+    app = load_app()
+    if app is None:
+        skipped.extend(["preview_full_redraw", "preview_one_edit"])
+        return
+    rng = random.Random(0)  # the same rows every run, so runs compare with the baseline
+    try:
+        for (table, max_rows) in ((app.target_rows, app.MAX_TARGET_ROWS),
+                                  (app.distractor_rows, app.MAX_DISTRACTOR_ROWS)):
+            with table.batch():
+                while len(table) < max_rows:
+                    table.add(symbol=rng.choice("TLXO"), size=rng.choice((12, 18, 24)))
+
+        def full_redraw():
+            for item in app.preview_items:
+                app.preview_canvas.delete(item["cid"])
+            del app.preview_items[:]
+            app.update_preview_canvas()
+            app.root.update_idletasks()
+
+        results["preview_full_redraw"] = median_ms(timed(full_redraw, repeats=7))
+
+        row = app.distractor_rows[len(app.distractor_rows) // 2]
+        colors = ["#000000", "#ff0000"]
+
+        def one_edit():
+            row.color = colors[0] if row.color != colors[0] else colors[1]
+            app.update_preview_canvas()
+            app.root.update_idletasks()
+
+        results["preview_one_edit"] = median_ms(timed(one_edit, repeats=21))
+    finally:
+        app.root.destroy()
+
+
+def bench_cold_start(results, skipped):
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        skipped.append("cold_start")
+        return
+    samples = []
+    for _ in range(COLD_START_RUNS):
+        out = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT,
+                              os.path.join(APP_DIR, "SearchTask_v0.1.py")],
+                             cwd=APP_DIR, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]) / 1000)
+    results["cold_start"] = median_ms(samples)
+
+
+###################################
+# Comparison
+###################################
+def compare(results, baseline, scale=1.0):
+    """
+    Returns a list of (case, median_ms, baseline_ms, ratio, limit, failed);
+    scale multiplies every threshold.
+    """
+    rows = []
+    for case, value in results.items():
+        base = baseline.get(case)
+        limit = THRESHOLDS.get(case, DEFAULT_THRESHOLD) * scale
+        if base is None or base <= 0:
+            rows.append((case, value, None, None, limit, False))
+            continue
+        ratio = value / base
+        rows.append((case, value, base, ratio, limit, ratio > limit))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--out", default=DEFAULT_RESULTS, help="where to write this run's results")
+    parser.add_argument("--threshold-scale", type=float, default=1.0,
+                        help="multiply every threshold, e.g. 2 on a shared CI machine")
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    skipped = []
+    bench_placement(results, skipped)
+    bench_lookups(results)
+    bench_csv_log(results)
+    bench_preview(results, skipped)
+    bench_cold_start(results, skipped)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f).get("results", {})
+
+    rows = compare(results, baseline, args.threshold_scale)
+    print(f"{'case':<26} {'median ms':>10} {'baseline':>10} {'ratio':>7} {'limit':>6}")
+    for (case, value, base, ratio, limit, failed) in rows:
+        base_s = f"{base:10.4f}" if base is not None else f"{'-':>10}"
+        ratio_s = f"{ratio:6.2f}x" if ratio is not None else f"{'-':>7}"
+        print(f"{case:<26} {value:10.4f} {base_s} {ratio_s} {limit:5.1f}x" + ("  REGRESSION" if failed else ""))
+    for case in skipped:
+        print(f"{case:<26} skipped (no display or NumPy)")
+
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "skipped": skipped,
+        "regressions": [row[0] for row in rows if row[5]],
+    }
+    with open(args.out, "w") as f:
+        json.dump(data, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"Warning: no baseline in {args.baseline}, so no case was checked for regressions. "
+              f"Record one on this machine with --update-baseline.")
+        return EXIT_NO_BASELINE
+    return 1 if data["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
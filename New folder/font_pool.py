@@ -0,0 +1,61 @@
+"""
+Interned pool of Tk fonts.
+
+tkFont.Font() creates a new named font in the Tk interpreter every time it
+is called. The pool hands back one shared Font per unique style tuple
+(family, size, bold, italic, underline), keeps at most max_size of them,
+and drops the least recently used one when full. Dropping our reference
+deletes the named font; Tk keeps it alive for any canvas item or widget
+still using it.
+"""
+from collections import OrderedDict
+
+import tkinter.font as tkFont
+
+DEFAULT_MAX_FONTS = 256
+
+
+class FontPool:
+    def __init__(self, max_size=DEFAULT_MAX_FONTS):
+        self.max_size = max(1, max_size)
+        self.fonts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, family, size, bold, italic, underline):
+        key = (family, int(size), bool(bold), bool(italic), bool(underline))
+        ft = self.fonts.get(key)
+        if ft is not None:
+            self.hits += 1
+            self.fonts.move_to_end(key)
+            return ft
+
+        self.misses += 1
+        ft = tkFont.Font(
+            family=family,
+            size=key[1],
+            weight="bold" if bold else "normal",
+            slant="italic" if italic else "roman",
+            underline=1 if underline else 0,
+        )
+        self.fonts[key] = ft
+        while len(self.fonts) > self.max_size:
+            self.fonts.popitem(last=False)
+            self.evictions += 1
+        return ft
+
+    def clear(self):
+        self.fonts.clear()
+
+    def stats(self):
+        return {
+            "size": len(self.fonts),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self.fonts)
@@ -0,0 +1,136 @@
+"""
+Display-timing instrumentation for the task display.
+
+Tk cannot see the display's vertical refresh, so a FrameTimer runs a
+high-frequency `after` heartbeat on the event loop during each trial and
+records the gap between ticks. Any gap longer than one refresh period at
+the configured refresh rate means the event loop was stalled across a frame
+boundary: the frame is counted late, and every further whole period in the
+gap as a dropped frame. Together with the stimulus-onset delay this shows
+which sessions ran on hardware that could not hold the promised rate.
+
+The heartbeat starts once the onset bookkeeping is done and the next
+trial's prefetch has been submitted, so neither is counted against the
+display. The prefetch itself runs in another process, but receiving its
+result can still briefly hold up the event loop: late frames whose gap
+overlaps a prefetch are flagged "during_prefetch" and counted separately,
+so the app's own stalls are not blamed on the hardware.
+
+The "Refresh Rate" and "Screen Size" settings are read from the
+configuration; "same as computer" falls back to NOMINAL_REFRESH_HZ and the
+actual screen size respectively.
+"""
+from array import array
+import re
+import time
+
+HEARTBEAT_MS = 1
+NOMINAL_REFRESH_HZ = 60.0
+LATE_FACTOR = 1.5      # a gap over 1.5 refresh periods is a late frame
+MAX_LATE_EVENTS = 500  # late frames listed individually per trial
+
+
+def parse_refresh_rate(value):
+    """
+    "120Hz" -> 120.0; "same as computer" (or anything unparseable) -> None.
+    """
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*hz", str(value or ""), re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+def parse_screen_size(value):
+    """
+    "16:9, 1920 x 1080" -> (1920, 1080); "same as computer" -> None.
+    """
+    match = re.search(r"(\d+)\s*x\s*(\d+)", str(value or ""))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+class FrameTimer:
+    def __init__(self, widget, refresh_hz=None, heartbeat_ms=HEARTBEAT_MS, prefetch_overlaps=None):
+        """
+        prefetch_overlaps: optional callable (start, end) -> True if a layout
+        prefetch was running at any time in that perf_counter() interval.
+        """
+        self.widget = widget
+        self.prefetch_overlaps = prefetch_overlaps
+        self.configured_hz = refresh_hz
+        self.refresh_hz = refresh_hz or NOMINAL_REFRESH_HZ
+        self.period = 1.0 / self.refresh_hz
+        self.heartbeat_ms = heartbeat_ms
+        self.intervals = array("d")
+        self.late_events = []
+        self.late_frames = 0
+        self.dropped_frames = 0
+        self.prefetch_late_frames = 0
+        self.prefetch_dropped_frames = 0
+        self.start_time = None
+        self.onset_time = None
+        self.last_tick = None
+        self.after_id = None
+
+    def start(self, onset_time, draw_start):
+        """
+        Start the heartbeat after stimulus onset; draw_start is when drawing
+        the display began, so onset - draw_start is the stimulus-onset delay.
+        Gaps are measured from now, not from onset_time.
+        """
+        self.start_time = draw_start
+        self.onset_time = onset_time
+        self.last_tick = time.perf_counter()
+        self.after_id = self.widget.after(self.heartbeat_ms, self._tick)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        gap = now - self.last_tick
+        self.last_tick = now
+        self.intervals.append(gap)
+        if gap > LATE_FACTOR * self.period:
+            dropped = int(gap / self.period) - 1
+            self.late_frames += 1
+            self.dropped_frames += dropped
+            during_prefetch = bool(self.prefetch_overlaps and self.prefetch_overlaps(now - gap, now))
+            if during_prefetch:
+                self.prefetch_late_frames += 1
+                self.prefetch_dropped_frames += dropped
+            if len(self.late_events) < MAX_LATE_EVENTS:
+                self.late_events.append({
+                    "at_ms": round((now - gap - self.onset_time) * 1000, 3),
+                    "gap_ms": round(gap * 1000, 3),
+                    "during_prefetch": during_prefetch,
+                })
+        self.after_id = self.widget.after(self.heartbeat_ms, self._tick)
+
+    def summary(self):
+        ordered = sorted(self.intervals)
+        count = len(ordered)
+
+        def pct(p):
+            return round(ordered[min(count - 1, int(p * count))] * 1000, 3) if count else None
+
+        return {
+            "configured_refresh_hz": self.configured_hz,
+            "assumed_refresh_hz": self.refresh_hz,
+            "frame_period_ms": round(self.period * 1000, 3),
+            "onset_delay_ms": (round((self.onset_time - self.start_time) * 1000, 3)
+                               if self.onset_time is not None else None),
+            "duration_ms": (round((self.last_tick - self.onset_time) * 1000, 3)
+                            if self.onset_time is not None else None),
+            "heartbeat_ticks": count,
+            "heartbeat_mean_ms": round(sum(ordered) / count * 1000, 3) if count else None,
+            "heartbeat_median_ms": pct(0.5),
+            "heartbeat_p99_ms": pct(0.99),
+            "heartbeat_max_ms": round(ordered[-1] * 1000, 3) if count else None,
+            "late_frames": self.late_frames,
+            "dropped_frames": self.dropped_frames,
+            "held_rate": self.late_frames == 0,
+            "late_frames_during_prefetch": self.prefetch_late_frames,
+            "dropped_frames_during_prefetch": self.prefetch_dropped_frames,
+            "held_rate_outside_prefetch": self.late_frames == self.prefetch_late_frames,
+            "late_events": self.late_events,
+        }
@@ -0,0 +1,97 @@
+"""
+Glyph-metrics cache.
+
+Every copy of a target or distractor row renders with identical metrics,
+so the (w, h) bbox only needs measuring once per unique style. The cache
+is keyed on (symbol, font, size, bold, italic, underline) and can be saved
+to a JSON file so later sessions skip measuring altogether.
+
+Saved metrics depend on the platform and Tk scaling they were measured
+with; pass a context string describing both, and a file written under a
+different context is ignored rather than reused.
+"""
+import json
+import os
+
+FILE_VERSION = 1
+
+
+def metrics_key(sym_conf):
+    return (
+        sym_conf["symbol"],
+        sym_conf["font"],
+        int(sym_conf["size"]),
+        bool(sym_conf["bold"]),
+        bool(sym_conf["italic"]),
+        bool(sym_conf["underline"]),
+    )
+
+
+class GlyphMetricsCache:
+    def __init__(self, path=None, context=""):
+        self.path = path
+        self.context = context
+        self.sizes = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        if path:
+            self.load(path)
+
+    def lookup(self, sym_conf, measure):
+        """
+        Return the cached (w, h) for sym_conf, calling measure(sym_conf) on a miss.
+        """
+        key = metrics_key(sym_conf)
+        size = self.sizes.get(key)
+        if size is not None:
+            self.hits += 1
+            return size
+        self.misses += 1
+        size = tuple(measure(sym_conf))
+        self.sizes[key] = size
+        self.dirty = True
+        return size
+
+    def provider(self, measure):
+        """
+        Wrap a metrics provider (see layout.py) so it goes through this cache.
+        """
+        return lambda sym_conf: self.lookup(sym_conf, measure)
+
+    def clear(self):
+        self.sizes.clear()
+        self.dirty = True
+
+    ###################################
+    # Persistence
+    ###################################
+    def load(self, path):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != FILE_VERSION or data.get("context") != self.context:
+            return
+        for entry in data.get("glyphs", []):
+            try:
+                symbol, font, size, bold, italic, underline, w, h = entry
+            except (TypeError, ValueError):
+                continue
+            self.sizes[(symbol, font, size, bold, italic, underline)] = (w, h)
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path or not self.dirty:
+            return
+        data = {
+            "version": FILE_VERSION,
+            "context": self.context,
+            "glyphs": [list(key) + list(size) for key, size in self.sizes.items()],
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        self.dirty = False
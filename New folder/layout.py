@@ -0,0 +1,122 @@
+"""
+Headless layout generation for the search display.
+
+This module has no Tk dependency. It takes the dict produced by
+get_configuration(), a canvas size and a glyph-metrics provider, and runs
+the expand -> measure -> shuffle -> place pipeline, returning plain layout
+records. start_task passes a provider that measures with the live canvas;
+display-less machines can use estimate_text_bbox (or any callable with the
+same signature) to generate and benchmark layouts, e.g. in a process pool.
+
+A metrics provider is any callable taking a symbol config dict
+("symbol","font","size","bold","italic","underline",...) and returning the
+(w, h) of the rendered text in pixels.
+"""
+import math
+import random
+import time
+
+import placement
+
+# Style fields copied from a target/distractor row onto each layout record
+STYLE_KEYS = ("symbol", "font", "size", "bold", "italic", "underline", "color")
+
+# Tk's default scaling on most displays is 96 dpi, i.e. 4/3 px per point
+PIXELS_PER_POINT = 4 / 3
+
+
+###################################
+# Metrics
+###################################
+def estimate_text_bbox(sym_conf):
+    """
+    Approximate Tk's bbox for a text item without a display. Good enough to
+    generate and benchmark layouts; start_task always measures for real.
+    """
+    px = abs(sym_conf["size"]) * PIXELS_PER_POINT
+    advance = 0.65 if sym_conf.get("bold") else 0.6
+    w = math.ceil(advance * px * max(1, len(sym_conf["symbol"]))) + 2
+    h = math.ceil(1.15 * px) + 2
+    return w, h
+
+
+###################################
+# Pipeline
+###################################
+def expand_items(config):
+    """
+    One (sym_conf, is_target) entry per item to show, targets first.
+    """
+    items = []
+    for t in config["targets"]:
+        for _ in range(t["quantity"]):
+            items.append((t, True))
+    for d in config["distractors"]:
+        for _ in range(d["quantity"]):
+            items.append((d, False))
+    return items
+
+
+def build_layout(config, c_width, c_height, measure=estimate_text_bbox, rng=random,
+                 min_dist=placement.DEFAULT_MIN_DIST, max_tries=placement.DEFAULT_MAX_TRIES,
+                 profile=None):
+    """
+    Generate a layout for config on a c_width x c_height canvas.
+
+    Returns (records, report): records is a list of dicts, one per placed
+    item, with the style keys plus "is_target" and the top-left "x","y" and
+    size "w","h"; report is placement.placement_report() for the run.
+    The layout algorithm comes from config["layout_algorithm"] (default random).
+    If profile is a dict, it receives "phases_ms" (expand, measure, shuffle,
+    place, records) and "placement" (the counters from placement.place_items).
+    """
+    algorithm = config.get("layout_algorithm", placement.LAYOUT_RANDOM)
+    t0 = time.perf_counter()
+
+    items = expand_items(config)
+    t1 = time.perf_counter()
+    # all copies of a row share its metrics, so measure each row once
+    row_sizes = {}
+    sizes = []
+    for (sym_conf, is_t) in items:
+        size = row_sizes.get(id(sym_conf))
+        if size is None:
+            size = row_sizes[id(sym_conf)] = measure(sym_conf)
+        sizes.append(size)
+    t2 = time.perf_counter()
+
+    order = list(range(len(items)))
+    rng.shuffle(order)
+    items = [items[i] for i in order]
+    sizes = [sizes[i] for i in order]
+    t3 = time.perf_counter()
+
+    stats = {} if profile is not None else None
+    positions = placement.place_items(sizes, c_width, c_height, algorithm=algorithm,
+                                      min_dist=min_dist, max_tries=max_tries, rng=rng,
+                                      stats=stats)
+    t4 = time.perf_counter()
+
+    records = []
+    for (sym_conf, is_t), (w, h), pos in zip(items, sizes, positions):
+        if pos is None:
+            continue
+        rec = {key: sym_conf.get(key) for key in STYLE_KEYS}
+        rec["is_target"] = is_t
+        rec["x"], rec["y"] = pos
+        rec["w"], rec["h"] = w, h
+        records.append(rec)
+
+    report = placement.placement_report(
+        [is_t for (sym_conf, is_t) in items], positions,
+        algorithm, min_dist, c_width, c_height
+    )
+    if profile is not None:
+        t5 = time.perf_counter()
+        profile["phases_ms"] = {
+            name: round((end - start) * 1000, 3)
+            for (name, start, end) in (("expand", t0, t1), ("measure", t1, t2), ("shuffle", t2, t3),
+                                       ("place", t3, t4), ("records", t4, t5))
+        }
+        profile["placement"] = stats
+    return records, report
@@ -0,0 +1,148 @@
+"""
+Compact on-disk format for placed layouts.
+
+A layout file stores one display: a JSON header (canvas size, seed,
+placement report, style table) followed by the items in columns, so a
+dense layout can be generated once and replayed for a whole study.
+
+    b"STLAYOUT"  magic
+    uint32       header length in bytes (little-endian)
+    header       UTF-8 JSON, see save_layout()
+    columns      one packed little-endian array per entry of header["columns"]
+
+Each item costs 21 bytes. Loading is a handful of array.frombytes() calls
+plus building the records, far cheaper than placing the items again.
+"""
+from array import array
+import json
+import struct
+import sys
+
+import layout
+
+MAGIC = b"STLAYOUT"
+FORMAT_VERSION = 1
+FILE_EXTENSION = ".layout"
+
+# (name, array typecode); x/y stay float64 so centres round-trip exactly
+COLUMNS = [
+    ("x", "d"),
+    ("y", "d"),
+    ("w", "H"),
+    ("h", "H"),
+    ("style", "H"),
+    ("is_target", "B"),
+]
+
+
+def save_layout(path, records, report=None, seed=None, c_width=None, c_height=None):
+    """
+    Write layout records (as returned by layout.build_layout) to path.
+    """
+    styles = []
+    style_index = {}
+    cols = {name: array(code) for (name, code) in COLUMNS}
+    for rec in records:
+        style = tuple(rec[key] for key in layout.STYLE_KEYS)
+        idx = style_index.get(style)
+        if idx is None:
+            idx = style_index[style] = len(styles)
+            styles.append(dict(zip(layout.STYLE_KEYS, style)))
+        cols["x"].append(rec["x"])
+        cols["y"].append(rec["y"])
+        cols["w"].append(int(round(rec["w"])))
+        cols["h"].append(int(round(rec["h"])))
+        cols["style"].append(idx)
+        cols["is_target"].append(1 if rec["is_target"] else 0)
+
+    if report is not None:
+        c_width = report.get("canvas_width", c_width)
+        c_height = report.get("canvas_height", c_height)
+    header = {
+        "version": FORMAT_VERSION,
+        "count": len(records),
+        "canvas_width": c_width,
+        "canvas_height": c_height,
+        "seed": seed,
+        "report": report,
+        "styles": styles,
+        "columns": COLUMNS,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for (name, code) in COLUMNS:
+            col = cols[name]
+            if sys.byteorder == "big":
+                col.byteswap()
+            f.write(col.tobytes())
+
+
+def _read_header(f, path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} is not a layout file")
+    raw = f.read(4)
+    if len(raw) < 4:
+        raise ValueError(f"{path}: layout file is truncated")
+    (header_len,) = struct.unpack("<I", raw)
+    raw = f.read(header_len)
+    if len(raw) < header_len:
+        raise ValueError(f"{path}: layout file is truncated")
+    try:
+        header = json.loads(raw.decode("utf-8"))
+    except ValueError:
+        raise ValueError(f"{path}: layout file header is corrupt")
+    if not isinstance(header, dict):
+        raise ValueError(f"{path}: layout file header is corrupt")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported layout file version {header.get('version')}")
+    if not (isinstance(header.get("count"), int) and isinstance(header.get("columns"), list)
+            and isinstance(header.get("styles"), list)):
+        raise ValueError(f"{path}: layout file header is corrupt")
+    return header
+
+
+def read_header(path):
+    """
+    Read only the header of a layout file, e.g. to check it before a session.
+    Raises OSError if it cannot be read, ValueError if it is not a layout file.
+    """
+    with open(path, "rb") as f:
+        return _read_header(f, path)
+
+
+def load_layout(path):
+    """
+    Read a layout file. Returns (records, header), records in the same form
+    layout.build_layout produces.
+    """
+    with open(path, "rb") as f:
+        header = _read_header(f, path)
+        data = f.read()
+    offset = 0
+
+    count = header["count"]
+    cols = {}
+    for (name, code) in header["columns"]:
+        col = array(code)
+        nbytes = col.itemsize * count
+        if offset + nbytes > len(data):
+            raise ValueError(f"{path}: layout file is truncated")
+        col.frombytes(data[offset:offset + nbytes])
+        if sys.byteorder == "big":
+            col.byteswap()
+        cols[name] = col
+        offset += nbytes
+
+    styles = header["styles"]
+    records = []
+    for x, y, w, h, style, is_t in zip(cols["x"], cols["y"], cols["w"], cols["h"],
+                                       cols["style"], cols["is_target"]):
+        rec = dict(styles[style])
+        rec["is_target"] = bool(is_t)
+        rec["x"], rec["y"] = x, y
+        rec["w"], rec["h"] = w, h
+        records.append(rec)
+    return records, header
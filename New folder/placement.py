@@ -0,0 +1,280 @@
+"""
+Item placement for the search display.
+
+The rule is the same one start_task has always used: two items may not
+have their centres closer than min_dist. Placed centres are kept in a
+uniform grid (spatial hash) whose cell size equals min_dist, so a
+candidate only has to be checked against the 3x3 block of cells around
+it instead of against every item placed so far.
+
+Three layout algorithms are available:
+  "random"  - the original random-retry loop (up to max_tries per item)
+  "poisson" - Bridson Poisson-disk sampling, which fills the canvas in
+              linear time and always terminates
+  "batch"   - the random-retry rule with candidates drawn and tested in
+              NumPy batches (placement_batch.py); falls back to "random"
+              when NumPy is not installed
+"""
+import math
+import random
+
+DEFAULT_MIN_DIST = 40
+DEFAULT_MAX_TRIES = 1000
+
+LAYOUT_RANDOM = "random"
+LAYOUT_POISSON = "poisson"
+LAYOUT_BATCH = "batch"
+LAYOUT_ALGORITHMS = [LAYOUT_RANDOM, LAYOUT_POISSON, LAYOUT_BATCH]
+
+# Candidates tried around each active sample before it is retired (Bridson's k)
+POISSON_CANDIDATES = 30
+
+
+###################################
+# Spatial hash
+###################################
+class SpatialHash:
+    """
+    Uniform grid of item centres. With cell_size >= min_dist, every centre
+    closer than min_dist to (cx, cy) lies in one of the 9 neighbouring cells.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = max(float(cell_size), 1.0)
+        self.cells = {}
+
+    def _cell(self, cx, cy):
+        return int(cx // self.cell_size), int(cy // self.cell_size)
+
+    def insert(self, cx, cy):
+        key = self._cell(cx, cy)
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [(cx, cy)]
+        else:
+            bucket.append((cx, cy))
+
+    def is_clear(self, cx, cy, min_dist):
+        """
+        True if no stored centre is closer than min_dist to (cx, cy).
+        Matches boxes_overlap: a distance of exactly min_dist is allowed.
+        """
+        limit = min_dist * min_dist
+        gx, gy = self._cell(cx, cy)
+        cells = self.cells
+        for nx in (gx - 1, gx, gx + 1):
+            for ny in (gy - 1, gy, gy + 1):
+                bucket = cells.get((nx, ny))
+                if not bucket:
+                    continue
+                for (px, py) in bucket:
+                    dx = cx - px
+                    dy = cy - py
+                    if dx * dx + dy * dy < limit:
+                        return False
+        return True
+
+    def __len__(self):
+        return sum(len(b) for b in self.cells.values())
+
+
+###################################
+# Random-retry placement
+###################################
+def place_random(sizes, c_width, c_height, min_dist=DEFAULT_MIN_DIST,
+                 max_tries=DEFAULT_MAX_TRIES, rng=random, stats=None):
+    """
+    Place items of the given (w, h) sizes at random top-left positions.
+
+    Each item gets up to max_tries random candidates, drawn exactly like the
+    original loop in start_task. Returns a list parallel to sizes holding
+    (x, y) for placed items and None for items that could not be placed.
+    If stats is a dict, the candidates drawn, retries (rejected candidates)
+    and failures (items not placed) are added to it.
+    """
+    grid = SpatialHash(min_dist)
+    randint = rng.randint
+    positions = []
+    candidates = 0
+    failures = 0
+    for (w, h) in sizes:
+        x_max = max(0, c_width - w)
+        y_max = max(0, c_height - h)
+        half_w = w / 2
+        half_h = h / 2
+        pos = None
+        tries = 0
+        for tries in range(1, max_tries + 1):
+            x_rand = randint(0, x_max)
+            y_rand = randint(0, y_max)
+            cx = x_rand + half_w
+            cy = y_rand + half_h
+            if min_dist <= 0 or grid.is_clear(cx, cy, min_dist):
+                grid.insert(cx, cy)
+                pos = (x_rand, y_rand)
+                break
+        candidates += tries
+        if pos is None:
+            failures += 1
+        positions.append(pos)
+    if stats is not None:
+        _add_stats(stats, candidates=candidates, retries=candidates - (len(sizes) - failures),
+                   failures=failures)
+    return positions
+
+
+###################################
+# Poisson-disk placement (Bridson)
+###################################
+def poisson_disk_points(x0, y0, x1, y1, min_dist, rng=random, k=POISSON_CANDIDATES):
+    """
+    Bridson's algorithm: a maximal set of points in [x0,x1] x [y0,y1] with no
+    two points closer than min_dist. Runs in time linear in the number of
+    points produced and stops once no active sample can spawn a neighbour.
+
+    Candidates are spaced evenly around a circle just outside min_dist from
+    a random starting angle (Roberts' variant of Bridson), which packs more
+    tightly and wastes fewer candidates than sampling the whole r..2r annulus.
+    """
+    width = max(0.0, x1 - x0)
+    height = max(0.0, y1 - y0)
+    cell = min_dist / math.sqrt(2)
+    # two spare cells on every side so neighbour lookups need no bounds checks
+    cols = int(width // cell) + 5
+    rows = int(height // cell) + 5
+    grid = [-1] * (cols * rows)  # at most one point per cell at this cell size
+    limit = min_dist * min_dist
+    # the 5x5 block minus its corners, which are always >= min_dist away
+    neighbours = [dy * cols + dx
+                  for dy in range(-2, 3) for dx in range(-2, 3)
+                  if abs(dx) + abs(dy) < 4]
+    radius = min_dist * 1.000001
+    step = 2 * math.pi / k
+    cos = math.cos
+    sin = math.sin
+    rand = rng.random
+
+    points = []
+    active = []
+
+    def add_point(px, py):
+        grid[(int((py - y0) // cell) + 2) * cols + int((px - x0) // cell) + 2] = len(points)
+        active.append(len(points))
+        points.append((px, py))
+
+    add_point(x0 + rand() * width, y0 + rand() * height)
+
+    while active:
+        a_idx = rng.randrange(len(active))
+        sx, sy = points[active[a_idx]]
+        start = rand() * 2 * math.pi
+        for j in range(k):
+            angle = start + j * step
+            px = sx + radius * cos(angle)
+            py = sy + radius * sin(angle)
+            if px < x0 or px > x1 or py < y0 or py > y1:
+                continue
+            base = (int((py - y0) // cell) + 2) * cols + int((px - x0) // cell) + 2
+            clear = True
+            for off in neighbours:
+                idx = grid[base + off]
+                if idx >= 0:
+                    qx, qy = points[idx]
+                    dx = px - qx
+                    dy = py - qy
+                    if dx * dx + dy * dy < limit:
+                        clear = False
+                        break
+            if clear:
+                add_point(px, py)
+                break
+        else:
+            # no room around this sample any more: retire it
+            active[a_idx] = active[-1]
+            active.pop()
+
+    return points
+
+
+def place_poisson(sizes, c_width, c_height, min_dist=DEFAULT_MIN_DIST, rng=random, stats=None):
+    """
+    Place items on Poisson-disk sample centres. Samples are drawn over the
+    region where the largest item still fits on the canvas, shuffled, and
+    handed out in item order. Items beyond the canvas capacity get None.
+    If stats is a dict, the samples drawn and failures (items not placed)
+    are added to it; Bridson's sampling has no per-item retries.
+    """
+    if not sizes:
+        return []
+    if min_dist <= 0:
+        return place_random(sizes, c_width, c_height, min_dist=min_dist, rng=rng, stats=stats)
+    max_w = max(w for (w, h) in sizes)
+    max_h = max(h for (w, h) in sizes)
+    x0, y0 = max_w / 2, max_h / 2
+    x1 = max(x0, c_width - max_w / 2)
+    y1 = max(y0, c_height - max_h / 2)
+
+    centres = poisson_disk_points(x0, y0, x1, y1, min_dist, rng=rng)
+    rng.shuffle(centres)
+
+    positions = []
+    for i, (w, h) in enumerate(sizes):
+        if i < len(centres):
+            cx, cy = centres[i]
+            positions.append((cx - w / 2, cy - h / 2))
+        else:
+            positions.append(None)
+    if stats is not None:
+        _add_stats(stats, samples=len(centres), failures=max(0, len(sizes) - len(centres)))
+    return positions
+
+
+###################################
+# Dispatch & report
+###################################
+def _add_stats(stats, **counts):
+    for name, n in counts.items():
+        stats[name] = stats.get(name, 0) + n
+
+
+def place_items(sizes, c_width, c_height, algorithm=LAYOUT_RANDOM,
+                min_dist=DEFAULT_MIN_DIST, max_tries=DEFAULT_MAX_TRIES, rng=random, stats=None):
+    if algorithm == LAYOUT_POISSON:
+        return place_poisson(sizes, c_width, c_height, min_dist=min_dist, rng=rng, stats=stats)
+    if algorithm == LAYOUT_BATCH:
+        import placement_batch  # imported on first use: NumPy is slow to import
+        if placement_batch.available():
+            return placement_batch.place_batch(sizes, c_width, c_height, min_dist=min_dist,
+                                               max_tries=max_tries, rng=rng, stats=stats)
+        print("Warning: batch placement needs NumPy; using random placement.")
+        algorithm = LAYOUT_RANDOM
+    if algorithm == LAYOUT_RANDOM:
+        return place_random(sizes, c_width, c_height, min_dist=min_dist,
+                            max_tries=max_tries, rng=rng, stats=stats)
+    raise ValueError(f"Unknown layout algorithm: {algorithm!r}")
+
+
+def placement_report(is_target_flags, positions, algorithm, min_dist, c_width, c_height):
+    """
+    Summarise how many targets and distractors were requested vs. placed.
+    """
+    report = {
+        "algorithm": algorithm,
+        "min_dist": min_dist,
+        "canvas_width": c_width,
+        "canvas_height": c_height,
+        "targets_requested": 0,
+        "targets_placed": 0,
+        "distractors_requested": 0,
+        "distractors_placed": 0,
+    }
+    for is_t, pos in zip(is_target_flags, positions):
+        kind = "targets" if is_t else "distractors"
+        report[f"{kind}_requested"] += 1
+        if pos is not None:
+            report[f"{kind}_placed"] += 1
+    report["complete"] = (
+        report["targets_placed"] == report["targets_requested"] and
+        report["distractors_placed"] == report["distractors_requested"]
+    )
+    return report
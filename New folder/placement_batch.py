@@ -0,0 +1,139 @@
+"""
+Vectorized random placement ("batch" layout algorithm).
+
+The same rule as placement.place_random: up to max_tries uniformly random
+top-left positions per item, and no two centres closer than min_dist (a
+distance of exactly min_dist is allowed). Instead of one candidate at a
+time, each round draws candidates for the next BATCH_SIZE unplaced items
+with NumPy (several per item once fewer items are left than that) and
+tests them all at once; each item takes its first candidate that fits:
+
+  - against the placed centres, through a grid of cell size min_dist/sqrt(2)
+    that holds at most one centre per cell, so each candidate only needs the
+    21 cells of its 5x5 neighbourhood (corners excluded) gathered from arrays;
+  - against each other, rejecting any candidate that conflicts with an
+    earlier one in the round. This can reject a candidate that would have
+    fitted, never accept one that does not; it simply tries again next round.
+
+Centres, sizes and the grid live in preallocated arrays, not dicts.
+
+NumPy is optional: available() is False without it and placement.place_items
+falls back to place_random. Candidates come from a NumPy generator seeded
+from rng, so a seeded layout is reproducible (though not identical to the
+pure-Python "random" layout for the same seed).
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy not installed
+    np = None
+
+BATCH_SIZE = 256
+
+
+def available():
+    return np is not None
+
+
+def place_batch(sizes, c_width, c_height, min_dist, max_tries, rng, stats=None, batch_size=BATCH_SIZE):
+    """
+    Same contract as placement.place_random: a list parallel to sizes of
+    (x, y) for placed items and None for items that could not be placed.
+    """
+    n = len(sizes)
+    if n == 0:
+        return []
+    gen = np.random.default_rng(rng.getrandbits(64))
+    wh = np.asarray(sizes, dtype=np.float64).reshape(n, 2)
+    x_max = np.maximum(0, np.floor(c_width - wh[:, 0])).astype(np.int64)
+    y_max = np.maximum(0, np.floor(c_height - wh[:, 1])).astype(np.int64)
+    half_w = wh[:, 0] / 2
+    half_h = wh[:, 1] / 2
+
+    pos = np.zeros((n, 2), dtype=np.int64)
+    placed = np.zeros(n, dtype=bool)
+    tries = np.zeros(n, dtype=np.int64)
+
+    if min_dist <= 0 or max_tries <= 0:
+        if max_tries > 0:
+            pos[:, 0] = gen.integers(0, x_max + 1)
+            pos[:, 1] = gen.integers(0, y_max + 1)
+            placed[:] = True
+            tries[:] = 1
+        return _finish(pos, placed, tries, stats)
+
+    limit = min_dist * min_dist
+    cell = min_dist / math.sqrt(2)
+    # two spare cells on every side so neighbour lookups need no bounds checks
+    cols = int(max(c_width, wh[:, 0].max()) // cell) + 5
+    rows = int(max(c_height, wh[:, 1].max()) // cell) + 5
+    grid = np.full(cols * rows, -1, dtype=np.int64)
+    centres = np.zeros((n, 2), dtype=np.float64)
+    offsets = np.array([dy * cols + dx
+                        for dy in range(-2, 3) for dx in range(-2, 3)
+                        if abs(dx) + abs(dy) < 4], dtype=np.int64)
+
+    pending = np.arange(n)
+    while pending.size:
+        chunk = pending[:batch_size]
+        k = chunk.size
+        reps = max(1, batch_size // k)
+        left = max_tries - tries[chunk]
+        # candidate j of item i, shape (k, reps)
+        xs = gen.integers(0, x_max[chunk, None] + 1, size=(k, reps))
+        ys = gen.integers(0, y_max[chunk, None] + 1, size=(k, reps))
+        cx = xs + half_w[chunk, None]
+        cy = ys + half_h[chunk, None]
+        base = ((cy // cell).astype(np.int64) + 2) * cols + (cx // cell).astype(np.int64) + 2
+
+        # against the placed centres
+        neighbours = grid[base[..., None] + offsets]
+        occupied = neighbours >= 0
+        near = centres[np.where(occupied, neighbours, 0)]
+        d2 = (cx[..., None] - near[..., 0]) ** 2 + (cy[..., None] - near[..., 1]) ** 2
+        clear = ~np.any(occupied & (d2 < limit), axis=2)
+        clear &= np.arange(reps)[None, :] < left[:, None]
+
+        # each item's first clear candidate
+        first = clear.argmax(axis=1)
+        found = clear[np.arange(k), first]
+        tries[chunk] += np.where(found, first + 1, np.minimum(reps, left))
+        ok = np.flatnonzero(found)
+        all_rows = np.arange(k)
+        xs = xs[all_rows, first]
+        ys = ys[all_rows, first]
+        cx = cx[all_rows, first]
+        cy = cy[all_rows, first]
+        base = base[all_rows, first]
+
+        # against earlier candidates of this round
+        if ok.size > 1:
+            px = cx[ok]
+            py = cy[ok]
+            pair_d2 = (px[:, None] - px[None, :]) ** 2 + (py[:, None] - py[None, :]) ** 2
+            ok = ok[~np.triu(pair_d2 < limit, k=1).any(axis=0)]
+
+        items = chunk[ok]
+        grid[base[ok]] = items
+        centres[items, 0] = cx[ok]
+        centres[items, 1] = cy[ok]
+        pos[items, 0] = xs[ok]
+        pos[items, 1] = ys[ok]
+        placed[items] = True
+
+        done = placed[chunk] | (tries[chunk] >= max_tries)
+        pending = np.concatenate((chunk[~done], pending[batch_size:]))
+
+    return _finish(pos, placed, tries, stats)
+
+
+def _finish(pos, placed, tries, stats):
+    positions = [tuple(p) if ok else None for p, ok in zip(pos.tolist(), placed.tolist())]
+    if stats is not None:
+        candidates = int(tries.sum())
+        n_placed = int(placed.sum())
+        for name, count in (("candidates", candidates), ("retries", candidates - n_placed),
+                            ("failures", len(positions) - n_placed)):
+            stats[name] = stats.get(name, 0) + count
+    return positions
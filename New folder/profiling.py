@@ -0,0 +1,108 @@
+"""
+Opt-in profiling of the setup UI and of each session.
+
+Profiling is off unless the SEARCHTASK_PROFILE environment variable or the
+"Profile session" advanced setting (config["profile"]) turns it on:
+
+    SEARCHTASK_PROFILE=1         phase timings and placement counters
+    SEARCHTASK_PROFILE=cprofile  the same, plus a cProfile of the whole session
+
+A SessionProfile records named phases on the time.perf_counter() clock,
+relative to when the profile was created, and a set of counters. start_task
+writes it next to the responses CSV as <csv name>_profile.json (and the
+cProfile statistics as <csv name>_profile.prof, readable with pstats or
+snakeviz). When profiling is off every method returns straight away.
+"""
+from contextlib import contextmanager
+import json
+import os
+import time
+
+ENV_VAR = "SEARCHTASK_PROFILE"
+
+PROFILE_OFF = "off"
+PROFILE_PHASES = "phases"
+PROFILE_CPROFILE = "cprofile"
+
+
+def profile_mode(config=None):
+    """
+    The environment variable wins over config["profile"] (False, True or "cprofile").
+    """
+    value = os.environ.get(ENV_VAR)
+    if value is None and config is not None:
+        value = config.get("profile")
+    if value is None or value is False or str(value).strip().lower() in ("", "0", "false", "off", "no"):
+        return PROFILE_OFF
+    if str(value).strip().lower() == PROFILE_CPROFILE:
+        return PROFILE_CPROFILE
+    return PROFILE_PHASES
+
+
+class SessionProfile:
+    def __init__(self, mode=PROFILE_OFF, origin=None):
+        self.mode = mode
+        self.enabled = mode != PROFILE_OFF
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self.counters = {}
+        self.profiler = None
+
+    def add_phase(self, name, start, end, **extra):
+        """
+        Record a phase that ran from start to end (perf_counter() values).
+        """
+        if not self.enabled:
+            return
+        self.phases.append(dict({
+            "phase": name,
+            "start_ms": round((start - self.origin) * 1000, 3),
+            "ms": round((end - start) * 1000, 3),
+        }, **extra))
+
+    @contextmanager
+    def phase(self, name, **extra):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start, time.perf_counter(), **extra)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    ###################################
+    # cProfile
+    ###################################
+    def start_cprofile(self):
+        if self.mode == PROFILE_CPROFILE and self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_cprofile(self, path):
+        """
+        Stop the cProfile run, if any, and dump its statistics to path.
+        """
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        self.profiler.dump_stats(path)
+        self.profiler = None
+        return path
+
+    ###################################
+    # Output
+    ###################################
+    def as_dict(self):
+        return {"mode": self.mode, "phases": self.phases, "counters": self.counters}
+
+    def write(self, path, **extra):
+        if not self.enabled:
+            return
+        with open(path, "w") as f:
+            json.dump(dict(self.as_dict(), **extra), f, indent=2)
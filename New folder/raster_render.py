@@ -0,0 +1,178 @@
+"""
+Rasterized stimulus rendering for very dense displays.
+
+Instead of one canvas text item per glyph, the whole layout is composited
+once into a single image (with Pillow) and shown as one canvas image item,
+so drawing, exposing and clearing the canvas no longer depend on how many
+items there are. Each distinct style is rendered once as a stamp and
+pasted at every position. A click erases just that glyph's patch of the
+image, repainting any neighbouring glyphs that overlap the patch.
+
+Pillow is optional: available() is False without it and start_task falls
+back to the vector (one text item per glyph) mode. It is only imported the
+first time raster rendering is asked for, so it does not slow down startup.
+"""
+import time
+
+Image = ImageDraw = ImageFont = ImageTk = None
+_pillow_checked = False
+
+RENDER_VECTOR = "vector"
+RENDER_RASTER = "raster"
+RENDER_MODES = [RENDER_VECTOR, RENDER_RASTER]
+
+PATCH_GRID = 64  # px per cell of the grid that finds the patches overlapping an erased one
+
+# Font files tried for each family, as (regular, bold, italic, bold italic)
+# base names; the first one Pillow can open wins.
+FONT_FILES = {
+    "Arial": ("arial", "arialbd", "ariali", "arialbi"),
+    "Times New Roman": ("times", "timesbd", "timesi", "timesbi"),
+    "Rockwell": ("rock", "rockb", "rocki", "rockbi"),
+    "Verdana": ("verdana", "verdanab", "verdanai", "verdanaz"),
+    "Helvetica": ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique"),
+}
+
+
+def _import_pillow():
+    global Image, ImageDraw, ImageFont, ImageTk, _pillow_checked
+    if _pillow_checked:
+        return
+    _pillow_checked = True
+    try:
+        from PIL import Image, ImageDraw, ImageFont, ImageTk
+    except ImportError:  # Pillow not installed
+        pass
+
+
+def available():
+    _import_pillow()
+    return Image is not None
+
+
+def load_font(family, px_size, bold, italic):
+    style = (1 if bold else 0) + (2 if italic else 0)
+    names = []
+    files = FONT_FILES.get(family)
+    if files:
+        names.append(files[style])
+    suffix = {0: "", 1: " Bold", 2: " Italic", 3: " Bold Italic"}[style]
+    names.append(family + suffix)
+    for name in names:
+        for ext in (".ttf", ".ttc", ".otf"):
+            try:
+                return ImageFont.truetype(name + ext, px_size)
+            except OSError:
+                continue
+    try:
+        return ImageFont.load_default(px_size)
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+class RasterStimulus:
+    def __init__(self, c_width, c_height, bg="white", px_per_point=4 / 3):
+        _import_pillow()
+        self.c_width = c_width
+        self.c_height = c_height
+        self.bg = bg
+        self.px_per_point = px_per_point
+        self.image = None
+        self.photo = None
+        self.master = None
+        self.stamps = {}
+        self.placed = []  # per record: (patch, stamp), None once erased
+        self.grid = {}  # (col, row) -> indices of the records whose patch touches that cell
+        self.composite_seconds = 0.0
+
+    def _stamp(self, rec):
+        key = (rec["symbol"], rec["font"], rec["size"], rec["bold"],
+               rec["italic"], rec["underline"], rec["color"])
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            px_size = max(1, round(abs(rec["size"]) * self.px_per_point))
+            font = load_font(rec["font"], px_size, rec["bold"], rec["italic"])
+            left, top, right, bottom = font.getbbox(rec["symbol"])
+            w = max(1, right - left)
+            h = max(1, bottom - top)
+            underline = max(1, px_size // 14) if rec["underline"] else 0
+            stamp = Image.new("RGBA", (w, h + 2 * underline), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(stamp)
+            draw.text((-left, -top), rec["symbol"], font=font, fill=rec["color"])
+            if underline:
+                draw.rectangle((0, h + underline, w, h + 2 * underline - 1), fill=rec["color"])
+            self.stamps[key] = stamp
+        return stamp
+
+    def render(self, records):
+        """
+        Composite all records into one image. Returns one patch (x1, y1, x2, y2)
+        per record: the pixels its glyph covers, centred on the record's box.
+        """
+        start = time.perf_counter()
+        self.image = Image.new("RGB", (self.c_width, self.c_height), self.bg)
+        self.placed = []
+        self.grid = {}
+        patches = []
+        for (i, rec) in enumerate(records):
+            stamp = self._stamp(rec)
+            sw, sh = stamp.size
+            x1 = int(round(rec["x"] + (rec["w"] - sw) / 2))
+            y1 = int(round(rec["y"] + (rec["h"] - sh) / 2))
+            self.image.paste(stamp, (x1, y1), stamp)
+            patch = (x1, y1, x1 + sw, y1 + sh)
+            patches.append(patch)
+            self.placed.append((patch, stamp))
+            for cell in self._cells(patch):
+                self.grid.setdefault(cell, []).append(i)
+        self.composite_seconds = time.perf_counter() - start
+        return patches
+
+    def _cells(self, patch):
+        x1, y1, x2, y2 = patch
+        for col in range(x1 // PATCH_GRID, (x2 - 1) // PATCH_GRID + 1):
+            for row in range(y1 // PATCH_GRID, (y2 - 1) // PATCH_GRID + 1):
+                yield (col, row)
+
+    def to_photo(self, master):
+        self.master = master
+        self.photo = ImageTk.PhotoImage(self.image, master=master)
+        return self.photo
+
+    def erase(self, index):
+        """
+        Remove the glyph of records[index] (as passed to render()) from the
+        shown image: its patch is cleared to the background colour and the
+        remaining glyphs whose patches overlap it are pasted back in order.
+        """
+        entry = self.placed[index]
+        if entry is None:
+            return
+        self.placed[index] = None
+        x1, y1, x2, y2 = entry[0]
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.c_width, x2), min(self.c_height, y2)
+        if x2 <= x1 or y2 <= y1:
+            return
+        region = Image.new("RGB", (x2 - x1, y2 - y1), self.bg)
+        neighbours = set()
+        for cell in self._cells((x1, y1, x2, y2)):
+            neighbours.update(self.grid.get(cell, ()))
+        for i in sorted(neighbours):  # render() order, so overlaps stack as before
+            other = self.placed[i]
+            if other is None:
+                continue
+            (ox1, oy1, ox2, oy2), stamp = other
+            if ox1 < x2 and ox2 > x1 and oy1 < y2 and oy2 > y1:
+                region.paste(stamp, (ox1 - x1, oy1 - y1), stamp)
+        self.image.paste(region, (x1, y1))
+        region_photo = ImageTk.PhotoImage(region, master=self.master)
+        self.master.tk.call(str(self.photo), "copy", str(region_photo), "-to", x1, y1)
+
+    def memory_bytes(self):
+        """
+        Approximate pixel memory: the RGB composite plus Tk's 32-bit photo.
+        """
+        pixels = self.c_width * self.c_height
+        stamps = sum(s.size[0] * s.size[1] * 4 for s in self.stamps.values())
+        return pixels * 3 + pixels * 4 + stamps
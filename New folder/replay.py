@@ -0,0 +1,219 @@
+"""
+Headless replay of recorded sessions.
+
+Re-runs on_click's nearest-item and nearest-target logic over a session's
+saved trial layouts and its responses CSV, without Tk:
+
+    python replay.py data/ --out replay_mismatches.csv
+
+For every responses_<...>.csv found, each trial's layout is read from
+<csv name>_trial<n>.layout next to it (as saved by start_task), or from
+--layout for sessions that only have one. Each logged click is replayed
+in order against an item_index.ItemIndex of the remaining items, exactly
+as on_click does (placement order as keys, the clicked item removed
+afterwards), and the recomputed nearest symbol, type, centre and both
+distances are compared with the logged ones. Differences (beyond
+--tolerance for numbers) are written one per row and column to the
+output CSV; the exit status is 1 if there were any.
+
+Sessions are replayed in a process pool. TrialReplay can also be used on
+its own to derive new per-click measures from old sessions.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import glob
+import math
+import os
+import sys
+import time
+
+import item_index
+import layout_file
+import placement
+
+SESSION_FILE_PATTERN = "responses_*.csv"
+MAX_MISMATCHES_PER_SESSION = 1000
+DEFAULT_TOLERANCE = 1e-6
+
+MISMATCH_COLUMNS = ["file", "row", "trial", "column", "logged", "replayed"]
+
+# columns compared, and whether they are numbers
+COMPARED_COLUMNS = [
+    ("NearestLetterChar", False),
+    ("NearestLetterType", False),
+    ("LetterCenterX", True),
+    ("LetterCenterY", True),
+    ("DistanceToSelection", True),
+    ("DistanceToNearestTarget", True),
+]
+
+
+class TrialReplay:
+    def __init__(self, records, min_dist=placement.DEFAULT_MIN_DIST):
+        """
+        records as from layout_file.load_layout or layout.build_layout.
+        """
+        self.records = records
+        self.items = item_index.ItemIndex(cell_size=min_dist)
+        self.targets = item_index.ItemIndex(cell_size=min_dist)
+        for key, rec in enumerate(records):
+            cx, cy = rec["x"] + rec["w"]/2, rec["y"] + rec["h"]/2
+            self.items.insert(key, cx, cy)
+            if rec["is_target"]:
+                self.targets.insert(key, cx, cy)
+
+    def click(self, x, y):
+        """
+        Handle a click at (x, y) as on_click does and return the logged
+        values as a dict keyed by CSV column, or None if no items are left.
+        """
+        key, dist = self.items.nearest(x, y)
+        if key is None:
+            return None
+        rec = self.records[key]
+        cx, cy = rec["x"] + rec["w"]/2, rec["y"] + rec["h"]/2
+        _, target_dist = self.targets.nearest(cx, cy)
+        self.items.remove(key)
+        if key in self.targets:
+            self.targets.remove(key)
+        return {
+            "NearestLetterChar": rec["symbol"],
+            "NearestLetterType": "target" if rec["is_target"] else "distractor",
+            "LetterCenterX": cx,
+            "LetterCenterY": cy,
+            "DistanceToSelection": dist,
+            "DistanceToNearestTarget": target_dist,
+        }
+
+
+def find_session_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "**", SESSION_FILE_PATTERN), recursive=True))
+        else:
+            files.append(path)
+    return sorted(set(os.path.abspath(f) for f in files))
+
+
+def trial_layout_path(csv_path, trial, layout_override=None):
+    path = f"{csv_path[:-len('.csv')]}_trial{trial}{layout_file.FILE_EXTENSION}"
+    if layout_override and not os.path.exists(path):
+        return layout_override
+    return path
+
+
+def values_match(logged, replayed, numeric, tolerance):
+    if not numeric:
+        return logged == str(replayed)
+    try:
+        value = float(logged)
+    except ValueError:
+        return False
+    return value == replayed or math.isclose(value, replayed, rel_tol=0.0, abs_tol=tolerance)
+
+
+###################################
+# Worker
+###################################
+def replay_session(csv_path, layout_override=None, tolerance=DEFAULT_TOLERANCE):
+    """
+    Replay one responses CSV. Returns (summary dict, list of mismatch rows);
+    at most MAX_MISMATCHES_PER_SESSION mismatches are kept, all are counted.
+    """
+    summary = {"file": csv_path, "rows": 0, "trials": 0, "mismatched_rows": 0, "error": None}
+    mismatches = []
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        col = {name: i for i, name in enumerate(header)}
+        i_x, i_y = col["ClickX"], col["ClickY"]
+        compared = [(name, col[name], numeric) for (name, numeric) in COMPARED_COLUMNS]
+        i_trial = col.get("Trial")  # sessions from before multi-trial blocks have one trial
+        trial = None
+        replay = None
+        for (row_number, row) in enumerate(reader, start=2):
+            if len(row) < len(header):
+                continue  # a row cut short by a crash
+            row_trial = row[i_trial] if i_trial is not None else "1"
+            if row_trial != trial:
+                trial = row_trial
+                records, _ = layout_file.load_layout(trial_layout_path(csv_path, trial, layout_override))
+                replay = TrialReplay(records)
+                summary["trials"] += 1
+            summary["rows"] += 1
+
+            replayed = replay.click(float(row[i_x]), float(row[i_y]))
+            row_mismatches = []
+            for (name, i, numeric) in compared:
+                value = None if replayed is None else replayed[name]
+                if value is None or not values_match(row[i], value, numeric, tolerance):
+                    row_mismatches.append({"file": csv_path, "row": row_number, "trial": trial,
+                                           "column": name, "logged": row[i],
+                                           "replayed": "" if value is None else value})
+            if row_mismatches:
+                summary["mismatched_rows"] += 1
+                room = MAX_MISMATCHES_PER_SESSION - len(mismatches)
+                mismatches.extend(row_mismatches[:max(0, room)])
+    return summary, mismatches
+
+
+def replay_all(paths, out, layout_override=None, tolerance=DEFAULT_TOLERANCE, workers=None):
+    """
+    Replay every session under paths and write the mismatches to the CSV out.
+    Returns the per-session summaries.
+    """
+    files = find_session_files(paths)
+    summaries = []
+    tmp_out = out + ".tmp"
+    with open(tmp_out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=MISMATCH_COLUMNS)
+        writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(path, pool.submit(replay_session, path, layout_override, tolerance))
+                       for path in files]
+            for (path, future) in futures:
+                try:
+                    summary, mismatches = future.result()
+                except (OSError, KeyError, ValueError, csv.Error) as e:
+                    print(f"Warning: {path}: cannot replay ({e}).")
+                    summary = {"file": path, "rows": 0, "trials": 0, "mismatched_rows": 0,
+                               "error": str(e)}
+                    mismatches = []
+                writer.writerows(mismatches)
+                summaries.append(summary)
+    os.replace(tmp_out, out)
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="searchtask-replay",
+        description="Replay recorded Search Task sessions headlessly and report rows that differ."
+    )
+    parser.add_argument("paths", nargs="+", help="response CSV files or directories to search")
+    parser.add_argument("--layout", help="layout file for sessions without their own <csv name>_trial<n>.layout")
+    parser.add_argument("--out", default="replay_mismatches.csv",
+                        help="mismatch CSV (default: replay_mismatches.csv)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed difference in centres and distances (default: %g)" % DEFAULT_TOLERANCE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summaries = replay_all(args.paths, args.out, args.layout, args.tolerance, args.workers)
+    seconds = time.perf_counter() - start
+    failed = [s for s in summaries if s["error"]]
+    differing = [s for s in summaries if s["mismatched_rows"]]
+    for s in differing:
+        print(f"{s['file']}: {s['mismatched_rows']} of {s['rows']} rows differ")
+    rows = sum(s["rows"] for s in summaries)
+    rate = f", {len(summaries) / seconds * 60:.0f} sessions/min" if seconds else ""
+    print(f"{len(summaries)} sessions, {rows} rows replayed in {seconds:.2f} s{rate}: "
+          f"{len(differing)} with differences, {len(failed)} failed (see {args.out}).")
+    return 1 if differing or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
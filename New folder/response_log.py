@@ -0,0 +1,171 @@
+"""
+Background CSV logger for click responses.
+
+The UI thread only puts rows on a queue; a writer thread owns the file,
+writes the rows and flushes them to the OS every flush_rows rows or every
+flush_interval seconds, whichever comes first. If the process dies, at most
+one flush window of rows is lost. close() drains the queue and fsyncs the
+file, so a finished session is on disk before the app exits.
+
+BufferedLogger is the queue and writer thread without the file; other
+outputs (see session_store.py) subclass it and supply _write, _flush_output,
+_finish and _close_output.
+"""
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+
+DEFAULT_FLUSH_ROWS = 10
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+
+# The columns start_task logs for every click (described in its docstring)
+RESPONSE_COLUMNS = [
+    "ClickX", "ClickY",
+    "NearestLetterChar", "NearestLetterType",
+    "LetterCenterX", "LetterCenterY",
+    "DistanceToSelection", "DistanceToNearestTarget",
+    "MonotonicTimeMs", "EventTimeMs",
+    "TimeSinceOnsetMs", "TimeSincePrevClickMs",
+    "HandlerDelayMs", "DispatchDelayMs",
+    "Trial",
+]
+
+_STOP = object()
+
+
+class BufferedLogger:
+    def __init__(self, flush_rows=DEFAULT_FLUSH_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.error = None
+        self.closed = False
+
+        # counters, only written by the writer thread
+        self.rows_written = 0
+        self.flushes = 0
+        self.max_queue_depth = 0
+        self.total_latency = 0.0  # enqueue -> flushed to the OS, summed over rows
+        self.max_latency = 0.0
+
+    def _start(self):
+        """
+        Start the writer thread; subclasses call this once their output is open.
+        """
+        self.thread = threading.Thread(target=self._run, name="response-log", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def log(self, row, stamp=None):
+        """
+        Queue one row for writing. Never touches the disk.
+        stamp: optional (column, start); row[column] is set to the milliseconds
+        from start (a time.perf_counter() value) to the row being queued. It
+        is taken last, just before the (non-blocking) put on the queue.
+        """
+        if self.error is not None:
+            raise self.error
+        now = time.perf_counter()
+        if stamp is not None:
+            column, start = stamp
+            row[column] = round((now - start) * 1000, 3)
+        self.queue.put((now, row))
+
+    def close(self):
+        """
+        Write everything still queued, fsync and close the file. Safe to call twice.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self.queue.put(_STOP)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "mean_write_latency_ms": (self.total_latency / self.rows_written * 1000
+                                      if self.rows_written else 0.0),
+            "max_write_latency_ms": self.max_latency * 1000,
+        }
+
+    ###################################
+    # Writer thread
+    ###################################
+    def _run(self):
+        pending = []  # enqueue times of rows written but not yet flushed
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                try:
+                    entry = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    entry = None
+
+                if entry is _STOP:
+                    break
+                if entry is not None:
+                    self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize() + 1)
+                    enqueued, row = entry
+                    self._write(row)
+                    pending.append(enqueued)
+                    if deadline is None:
+                        deadline = enqueued + self.flush_interval
+
+                if pending and (len(pending) >= self.flush_rows or time.perf_counter() >= deadline):
+                    self._flush(pending)
+                    pending = []
+                    deadline = None
+
+            if pending:
+                self._flush(pending)
+            self._finish()
+        except Exception as exc:  # surfaced to the UI thread via log()/close()
+            self.error = exc
+        finally:
+            self._close_output()
+
+    def _flush(self, pending):
+        self._flush_output()
+        now = time.perf_counter()
+        for enqueued in pending:
+            latency = now - enqueued
+            self.total_latency += latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+        self.rows_written += len(pending)
+        self.flushes += 1
+
+
+class BufferedCSVLogger(BufferedLogger):
+    def __init__(self, filename, header, flush_rows=DEFAULT_FLUSH_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        super().__init__(flush_rows, flush_interval)
+        self.filename = filename
+        self.file = open(filename, mode="w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+        self.file.flush()
+        self._start()
+
+    def _write(self, row):
+        self.writer.writerow(row)
+
+    def _flush_output(self):
+        self.file.flush()
+
+    def _finish(self):
+        os.fsync(self.file.fileno())
+
+    def _close_output(self):
+        self.file.close()
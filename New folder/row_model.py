@@ -0,0 +1,117 @@
+"""
+Row model for the Targets and Distractors panels.
+
+Each row is a GlyphRow with __slots__ holding plain Python values; this,
+not the Tk variables, is the source of truth. The Tk variables behind the
+widgets write into the model through one trace each, so reading a row or
+summing quantities never goes through Tcl.
+
+A RowTable keeps its rows in order together with a running total of their
+quantities, updated as edits come in, so validation is O(1) per edit. It
+calls on_change only when a value actually changes, and batch() holds
+those notifications back until a group of edits is done, then sends one.
+"""
+from contextlib import contextmanager
+
+ROW_FIELDS = ("symbol", "font", "size", "bold", "underline", "italic", "color", "quantity")
+
+ROW_DEFAULTS = {
+    "symbol": "",
+    "font": "Arial",
+    "size": 18,
+    "bold": False,
+    "underline": False,
+    "italic": False,
+    "color": "#000000",
+    "quantity": 1,
+}
+
+
+class GlyphRow:
+    # "ui" is left to the view layer (Tk variables, widgets); the model never reads it
+    __slots__ = ROW_FIELDS + ("ui",)
+
+    def __init__(self, **fields):
+        for field in ROW_FIELDS:
+            setattr(self, field, fields.get(field, ROW_DEFAULTS[field]))
+        self.ui = None
+
+    def as_config(self):
+        """
+        The row as it appears in get_configuration()["targets"/"distractors"].
+        """
+        return {field: getattr(self, field) for field in ROW_FIELDS}
+
+
+class RowTable:
+    def __init__(self, on_change=None):
+        self.rows = []
+        self.total_quantity = 0
+        self.on_change = on_change
+        self._batch_depth = 0
+        self._changed = False
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, i):
+        return self.rows[i]
+
+    def index(self, row):
+        return self.rows.index(row)
+
+    def add(self, **fields):
+        row = GlyphRow(**fields)
+        self.rows.append(row)
+        self.total_quantity += row.quantity
+        self._notify()
+        return row
+
+    def remove(self, row):
+        self.rows.remove(row)
+        self.total_quantity -= row.quantity
+        self._notify()
+
+    def clear(self):
+        if not self.rows:
+            return
+        self.rows = []
+        self.total_quantity = 0
+        self._notify()
+
+    def set(self, row, field, value):
+        old = getattr(row, field)
+        if old == value:
+            return
+        setattr(row, field, value)
+        if field == "quantity":
+            self.total_quantity += value - old
+        self._notify()
+
+    ###################################
+    # Change notification
+    ###################################
+    @contextmanager
+    def batch(self):
+        """
+        Hold change notifications until the outermost batch ends, then send
+        at most one.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._changed:
+                self._changed = False
+                if self.on_change is not None:
+                    self.on_change()
+
+    def _notify(self):
+        if self._batch_depth:
+            self._changed = True
+        elif self.on_change is not None:
+            self.on_change()
@@ -0,0 +1,204 @@
+"""
+Command-line batch mode.
+
+Validates exported configuration files (File > Save configuration) with the
+same rules as the Run button and pre-generates layouts for them without
+opening the GUI, spreading the work over a process pool:
+
+    searchtask study.json --layouts 200 --out layouts/
+
+writes layouts/study/layout_<n>.layout for n = 1..200 (see layout_file.py)
+plus layouts/summary.json with per-config placement and throughput figures.
+A generated layout file can be used as a trial's "layout_file"; a block
+trial that already names one gets a copy of that file instead of a new layout.
+
+Layouts are seeded from the configuration's "seed" (or a fresh one) and the
+layout number, as trials.trial_rng does for trials within a session, so a
+seeded run reproduces exactly. Glyphs are measured with
+layout.estimate_text_bbox unless --metrics names a glyph-metrics cache file
+saved by the GUI (see glyph_metrics.py).
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import shutil
+import sys
+import time
+
+import frame_timing
+import glyph_metrics
+import layout
+import layout_file
+import trials
+import validation
+
+DEFAULT_CANVAS_SIZE = (1400, 810)  # the GUI's default window size
+
+
+def load_config(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def size_argument(value):
+    """
+    argparse type for --size: "1400x810" -> (1400, 810).
+    """
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH, e.g. 1400x810, not {value!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"width and height must be positive, not {value!r}")
+    return width, height
+
+
+def canvas_size(config, size_arg):
+    if size_arg:
+        return size_arg
+    return frame_timing.parse_screen_size(config.get("screen_size")) or DEFAULT_CANVAS_SIZE
+
+
+_providers = {}  # metrics_path -> provider, per worker process
+
+
+def measure_provider(metrics_path):
+    """
+    Metrics from a saved cache file whatever context it was saved under,
+    estimated for glyphs it does not have.
+    """
+    if not metrics_path:
+        return layout.estimate_text_bbox
+    provider = _providers.get(metrics_path)
+    if provider is None:
+        with open(metrics_path, "r") as f:
+            context = json.load(f).get("context", "")
+        cache = glyph_metrics.GlyphMetricsCache(metrics_path, context=context)
+        provider = _providers[metrics_path] = cache.provider(layout.estimate_text_bbox)
+    return provider
+
+
+###################################
+# Worker
+###################################
+def generate_layout(config, layout_number, seed, c_width, c_height, metrics_path, path):
+    """
+    Build one layout and write it to path. Runs in a worker process, so it
+    only takes and returns picklable values. A trial with its own
+    "layout_file" is copied to path as it is.
+    """
+    trial_configs = trials.expand_block(config)
+    trial_config = trial_configs[(layout_number - 1) % len(trial_configs)]
+    source = trial_config.get("layout_file")
+    if source:
+        header = layout_file.read_header(source)
+        shutil.copyfile(source, path)
+        return header["count"], (header.get("report") or {}).get("complete", True)
+    records, report = layout.build_layout(
+        trial_config, c_width, c_height,
+        measure=measure_provider(metrics_path),
+        rng=trials.trial_rng(seed, layout_number)
+    )
+    report["seed"] = seed
+    report["trial"] = layout_number
+    layout_file.save_layout(path, records, report, seed=seed)
+    return len(records), report["complete"]
+
+
+###################################
+# Batch
+###################################
+def run_batch(args):
+    summary = {"configs": [], "layouts": 0, "items": 0, "seconds": 0.0}
+    failed = False
+    jobs = []
+    for path in args.configs:
+        try:
+            config = load_config(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: cannot read configuration ({e})")
+            failed = True
+            continue
+        config, error = validation.normalize_configuration(config)
+        if not error:
+            error = validation.validate_configuration(config)  # the GUI's checks and messages
+        if error:
+            print(f"{path}: {error}")
+            failed = True
+            continue
+        print(f"{path}: OK")
+        jobs.append((path, config))
+
+    if args.validate_only or failed or args.layouts <= 0:
+        return 1 if failed else 0
+
+    os.makedirs(args.out, exist_ok=True)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for (path, config) in jobs:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            out_dir = os.path.join(args.out, stem)
+            os.makedirs(out_dir, exist_ok=True)
+            seed = config.get("seed")
+            if seed is None:
+                seed = trials.new_seed()
+            c_width, c_height = canvas_size(config, args.size)
+            config_start = time.perf_counter()
+            futures = [
+                pool.submit(generate_layout, config, n, seed, c_width, c_height, args.metrics,
+                            os.path.join(out_dir, f"layout_{n}{layout_file.FILE_EXTENSION}"))
+                for n in range(1, args.layouts + 1)
+            ]
+            results = [future.result() for future in futures]
+            seconds = time.perf_counter() - config_start
+            items = sum(count for (count, _) in results)
+            incomplete = sum(1 for (_, complete) in results if not complete)
+            summary["configs"].append({
+                "config": path,
+                "out_dir": out_dir,
+                "seed": seed,
+                "canvas_width": c_width,
+                "canvas_height": c_height,
+                "layouts": len(results),
+                "items": items,
+                "incomplete_layouts": incomplete,
+                "seconds": round(seconds, 3),
+            })
+            summary["layouts"] += len(results)
+            summary["items"] += items
+            if incomplete:
+                print(f"Warning: {path}: {incomplete} of {len(results)} layouts could not place every item.")
+
+    seconds = time.perf_counter() - start
+    summary["seconds"] = round(seconds, 3)
+    summary["workers"] = args.workers or os.cpu_count()
+    summary["layouts_per_second"] = round(summary["layouts"] / seconds, 1) if seconds else None
+    summary["items_per_second"] = round(summary["items"] / seconds, 1) if seconds else None
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"{summary['layouts']} layouts ({summary['items']} items) in {summary['seconds']} s: "
+          f"{summary['layouts_per_second']} layouts/s, {summary['items_per_second']} items/s")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="searchtask",
+        description="Validate Search Task configurations and pre-generate their layouts."
+    )
+    parser.add_argument("configs", nargs="+", help="configuration JSON files saved from the GUI")
+    parser.add_argument("--layouts", type=int, default=1, help="layouts to generate per configuration")
+    parser.add_argument("--out", default="layouts", help="output directory (default: layouts)")
+    parser.add_argument("--size", type=size_argument,
+                        help="canvas size as WxH (default: the configuration's screen size, "
+                                       "else %dx%d)" % DEFAULT_CANVAS_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--metrics", help="glyph-metrics cache file to measure glyphs with")
+    parser.add_argument("--validate-only", action="store_true", help="only validate the configurations")
+    args = parser.parse_args(argv)
+    return run_batch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+SQLite output backend: click responses go into one database per study
+instead of a CSV file per session.
+
+With config["output_backend"] == "sqlite", start_task logs to
+config["database"] (default DEFAULT_DATABASE in the working directory)
+through SQLiteSessionLogger, a response_log.BufferedLogger: the UI thread
+only queues rows, and the writer thread inserts them in one transaction
+per flush window (flush_rows rows or flush_interval seconds). The database
+runs in WAL mode, so another process can read it while a session is being
+recorded. close() commits what is left and checkpoints the WAL into the
+database file.
+
+Tables:
+    sessions  one row per session: study_id, session, administrator,
+              started_at, name (the file stem the session's side files
+              use) and config, the full get_configuration() snapshot as JSON
+    clicks    one row per logged click: session_id, study_id, session and
+              trial, then the CSV columns in snake_case (ClickX -> click_x),
+              declared with the types in COLUMN_TYPES (blank values are NULL)
+
+clicks is indexed on (study_id, session, trial) and session_id, so queries
+across sessions need no scan of the whole table, e.g.
+
+    SELECT session, COUNT(*) FROM clicks
+    WHERE study_id = ? AND nearest_letter_type = 'target' GROUP BY session
+
+sqlite3 is only imported when a session store is opened.
+"""
+import json
+import re
+import time
+
+import response_log
+
+OUTPUT_CSV = "csv"
+OUTPUT_SQLITE = "sqlite"
+OUTPUT_BACKENDS = [OUTPUT_CSV, OUTPUT_SQLITE]
+
+DEFAULT_DATABASE = "searchtask.sqlite3"
+
+# SQL type per response column; columns not listed are TEXT
+COLUMN_TYPES = {
+    "ClickX": "INTEGER",
+    "ClickY": "INTEGER",
+    "NearestLetterChar": "TEXT",
+    "NearestLetterType": "TEXT",
+    "LetterCenterX": "REAL",
+    "LetterCenterY": "REAL",
+    "DistanceToSelection": "REAL",
+    "DistanceToNearestTarget": "REAL",
+    "MonotonicTimeMs": "REAL",
+    "EventTimeMs": "INTEGER",
+    "TimeSinceOnsetMs": "REAL",
+    "TimeSincePrevClickMs": "REAL",
+    "HandlerDelayMs": "REAL",
+    "DispatchDelayMs": "REAL",
+    "Trial": "INTEGER",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    study_id TEXT NOT NULL,
+    session TEXT NOT NULL,
+    administrator TEXT,
+    started_at TEXT NOT NULL,
+    name TEXT,
+    config TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_study_session ON sessions (study_id, session);
+"""
+
+
+def column_name(header_name):
+    """
+    "DistanceToNearestTarget" -> "distance_to_nearest_target"
+    """
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", header_name).lower()
+
+
+def open_database(path):
+    import sqlite3
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def column_definition(header_name):
+    return f"{column_name(header_name)} {COLUMN_TYPES.get(header_name, 'TEXT')}"
+
+
+def create_clicks_table(connection, header):
+    columns = [column_name(name) for name in header]
+    extra = ",\n    ".join(column_definition(name) for name in header if column_name(name) != "trial")
+    connection.executescript(f"""
+CREATE TABLE IF NOT EXISTS clicks (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    study_id TEXT NOT NULL,
+    session TEXT NOT NULL,
+    trial INTEGER,
+    {extra}
+);
+CREATE INDEX IF NOT EXISTS clicks_study_session_trial ON clicks (study_id, session, trial);
+CREATE INDEX IF NOT EXISTS clicks_session_id ON clicks (session_id);
+""")
+    existing = {row[1] for row in connection.execute("PRAGMA table_info(clicks)")}
+    for name in header:
+        if column_name(name) not in existing:  # a database written by an older version
+            connection.execute(f"ALTER TABLE clicks ADD COLUMN {column_definition(name)}")
+    return columns
+
+
+class SQLiteSessionLogger(response_log.BufferedLogger):
+    def __init__(self, path, header, config, name=None, flush_rows=response_log.DEFAULT_FLUSH_ROWS,
+                 flush_interval=response_log.DEFAULT_FLUSH_INTERVAL):
+        """
+        Open (or create) the database at path and record a new session for
+        config. Rows passed to log() follow header, as for BufferedCSVLogger.
+        """
+        super().__init__(flush_rows, flush_interval)
+        self.filename = path
+        self.connection = open_database(path)
+        columns = create_clicks_table(self.connection, header)
+        self.trial_column = columns.index("trial") if "trial" in columns else None
+        with self.connection:
+            self.session_id = self.connection.execute(
+                "INSERT INTO sessions (study_id, session, administrator, started_at, name, config) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(config.get("study_id", "")), str(config.get("session", "")),
+                 config.get("administrator"), time.strftime("%Y-%m-%dT%H:%M:%S"), name,
+                 json.dumps(config))
+            ).lastrowid
+        self.row_prefix = (self.session_id, str(config.get("study_id", "")), str(config.get("session", "")))
+        row_columns = [name for name in columns if name != "trial"]
+        self.insert_sql = (
+            f"INSERT INTO clicks (session_id, study_id, session, trial, {', '.join(row_columns)}) "
+            f"VALUES ({', '.join('?' * (len(row_columns) + 4))})"
+        )
+        self.batch = []
+        self._start()
+
+    def _write(self, row):
+        values = [None if value == "" else value for value in row]
+        trial = values.pop(self.trial_column) if self.trial_column is not None else None
+        self.batch.append(self.row_prefix + (trial,) + tuple(values))
+
+    def _flush_output(self):
+        if self.batch:
+            with self.connection:  # one transaction per flush window
+                self.connection.executemany(self.insert_sql, self.batch)
+            self.batch = []
+
+    def _finish(self):
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _close_output(self):
+        self.connection.close()
@@ -5,7 +5,22 @@ OPTIONS = {
     'argv_emulation': True,
 }
 
+MODULES = [
+    'analytics', 'font_pool', 'frame_timing', 'glyph_metrics', 'item_index', 'layout',
+    'layout_file', 'placement', 'placement_batch', 'profiling', 'raster_render', 'replay',
+    'response_log', 'row_model',
+    'searchtask_cli', 'session_store', 'trials', 'validation',
+]
+
 setup(
     app=APP,
     options={'py2app': OPTIONS},
+    py_modules=MODULES,
+    entry_points={
+        'console_scripts': [
+            'searchtask=searchtask_cli:main',
+            'searchtask-analyze=analytics:main',
+            'searchtask-replay=replay:main',
+        ],
+    },
 )
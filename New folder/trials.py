@@ -0,0 +1,208 @@
+"""
+Multi-trial blocks with next-layout prefetch.
+
+A session runs a block of trials. expand_block() turns one configuration
+into the list of per-trial configurations, and TrialScheduler hands them
+out in order. While one trial is on screen, the scheduler builds the next
+trial's layout in a worker process, so the gap between trials does not
+depend on how many items the next display has. Placement is CPU-bound pure
+Python; on a thread it would hold the GIL and stall the event loop (and
+with it click handling and frame timing) for the current trial.
+
+Glyph measurement may need Tk, which must stay on the main thread, so the
+scheduler measures each trial's rows up front (one call per row, usually a
+cache hit) and the worker only sees the resulting sizes. The first trial
+is built directly, as nothing is on screen yet to stall. The worker is
+started with "spawn" on every platform: by then the app has a Tk display
+connection and the response writer thread, which a forked child would
+inherit (with any locks they held). This module imports without side
+effects, so the spawned worker only needs it and its imports.
+
+Every trial gets its own RNG derived from the session seed and the trial
+number, so a seeded block reproduces exactly. A trial whose configuration
+names a "layout_file" is loaded from that file instead of being placed.
+"""
+import random
+import time
+
+import glyph_metrics
+import layout
+import layout_file
+import placement
+
+
+def expand_block(config):
+    """
+    Per-trial configurations for a session.
+
+    If config has a "block" list, each entry is a dict of keys overriding the
+    base configuration for one trial (e.g. its own "targets"/"distractors").
+    Otherwise the configuration is repeated config["trials"] times (default 1).
+    """
+    base = {key: val for key, val in config.items() if key != "block"}
+    block = config.get("block")
+    if block:
+        return [dict(base, **override) for override in block]
+    return [dict(base) for _ in range(max(1, int(config.get("trials", 1))))]
+
+
+def new_seed():
+    return random.SystemRandom().randrange(2**32)
+
+
+def trial_rng(seed, trial_number):
+    """
+    Independent, reproducible RNG for one trial of a seeded session.
+    """
+    return random.Random(f"{seed}:{trial_number}")
+
+
+def measure_rows(config, measure):
+    """
+    Measure every target/distractor row once; returns {metrics_key: (w, h)}.
+    """
+    sizes = {}
+    for row in list(config["targets"]) + list(config["distractors"]):
+        key = glyph_metrics.metrics_key(row)
+        if key not in sizes:
+            sizes[key] = tuple(measure(row))
+    return sizes
+
+
+def build_trial(config, trial_number, seed, sizes, c_width, c_height, min_dist,
+                save_prefix=None, profile=False, measure_ms=None):
+    """
+    Build (or load) one trial's layout; returns (records, report). Runs in
+    the prefetch worker process, so takes and returns only picklable values.
+    """
+    profile = {"measure_rows_ms": measure_ms} if profile else None
+    start = time.perf_counter()
+    path = config.get("layout_file")
+    if path:
+        records, header = layout_file.load_layout(path)
+        report = dict(header.get("report") or {})
+        report.setdefault("complete", True)
+        report["layout_file"] = path
+        seed = header.get("seed")
+    else:
+        records, report = layout.build_layout(
+            config, c_width, c_height,
+            measure=lambda row: sizes[glyph_metrics.metrics_key(row)],
+            rng=trial_rng(seed, trial_number), min_dist=min_dist,
+            profile=profile
+        )
+    report["seed"] = seed
+    report["trial"] = trial_number
+    built = time.perf_counter()
+    if save_prefix:
+        layout_file.save_layout(f"{save_prefix}_trial{trial_number}{layout_file.FILE_EXTENSION}",
+                                records, report, seed=seed)
+    if profile is not None:
+        profile["build_ms"] = round((built - start) * 1000, 3)
+        profile["save_ms"] = round((time.perf_counter() - built) * 1000, 3)
+        report["profile"] = profile
+    return records, report
+
+
+class TrialScheduler:
+    def __init__(self, configs, c_width, c_height, measure,
+                 min_dist=placement.DEFAULT_MIN_DIST, save_prefix=None, profile=False):
+        """
+        save_prefix: if given, every trial's layout is also written to
+        <save_prefix>_trial<n>.layout (see layout_file.py).
+        profile: if true, each report gets a "profile" entry with the time
+        spent in every phase of building it and the placement counters.
+        """
+        self.configs = list(configs)
+        self.c_width = c_width
+        self.c_height = c_height
+        self.measure = measure
+        self.min_dist = min_dist
+        self.save_prefix = save_prefix
+        self.profile = profile
+        self.next_index = 0
+        self.pending = None  # (trial_number, config, future)
+        self.executor = None  # started by the first prefetch()
+        # perf_counter() times the current prefetch started and finished
+        self.prefetch_started = None
+        self.prefetch_finished = None
+
+    def __len__(self):
+        return len(self.configs)
+
+    def has_next(self):
+        return self.pending is not None or self.next_index < len(self.configs)
+
+    def _take_next(self):
+        """
+        The next trial's (trial_number, build_trial arguments), measured on this thread.
+        """
+        config = self.configs[self.next_index]
+        trial_number = self.next_index + 1
+        self.next_index += 1
+
+        seed = config.get("seed")
+        if seed is None:
+            seed = new_seed()
+        start = time.perf_counter()
+        sizes = None if config.get("layout_file") else measure_rows(config, self.measure)
+        measure_ms = round((time.perf_counter() - start) * 1000, 3)
+        return trial_number, (config, trial_number, seed, sizes, self.c_width, self.c_height,
+                              self.min_dist, self.save_prefix, self.profile, measure_ms)
+
+    def prefetch(self):
+        """
+        Start building the next trial's layout in the worker process. Call
+        from the main thread; does nothing if it is already running or the block is done.
+        """
+        if self.pending is not None or self.next_index >= len(self.configs):
+            return
+        trial_number, args = self._take_next()
+        if self.executor is None:
+            # imported here: concurrent.futures (and multiprocessing) would add to app startup
+            from concurrent.futures import ProcessPoolExecutor
+            import multiprocessing
+            self.executor = ProcessPoolExecutor(max_workers=1,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        self.prefetch_started = time.perf_counter()
+        self.prefetch_finished = None
+        future = self.executor.submit(build_trial, *args)
+        future.add_done_callback(self._prefetch_done)
+        self.pending = (trial_number, args[0], future)
+
+    def _prefetch_done(self, future):
+        self.prefetch_finished = time.perf_counter()
+
+    def prefetch_overlaps(self, start, end):
+        """
+        True if the most recent prefetch was running at any time between
+        start and end (perf_counter() values).
+        """
+        if self.prefetch_started is None or self.prefetch_started > end:
+            return False
+        return self.prefetch_finished is None or self.prefetch_finished >= start
+
+    def next_trial(self):
+        """
+        Return (trial_number, config, records, report) for the next trial,
+        waiting for its prefetch to finish if needed (or building it here if
+        none was started), or None when the block is done.
+        """
+        if self.pending is None:
+            if self.next_index >= len(self.configs):
+                return None
+            trial_number, args = self._take_next()
+            records, report = build_trial(*args)
+            return trial_number, args[0], records, report
+        trial_number, config, future = self.pending
+        self.pending = None
+        records, report = future.result()
+        return trial_number, config, records, report
+
+    def shutdown(self):
+        """
+        Stop the worker process. Waits for a prefetch still running: leaving
+        it behind makes the pool's exit handler fail when the app quits.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
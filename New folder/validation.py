@@ -0,0 +1,160 @@
+"""
+Configuration checks shared by the GUI (validate_and_run) and the
+command-line batch mode. Works on the dict from get_configuration().
+
+normalize_configuration() comes first for configurations read from a file
+(Import Settings, the batch mode): it checks the types and converts the
+values a hand-edited JSON file commonly gets wrong, such as "3" for 3.
+"""
+import layout_file
+import placement
+import row_model
+import trials
+
+TEXT_KEYS = ("study_id", "session", "administrator")
+ROW_LIST_KEYS = ("targets", "distractors")
+
+
+def validate_configuration(cfg):
+    """
+    Return an error message for the first rule cfg breaks, or None if it
+    can be run. The messages are the ones shown under the Run button.
+    With a "block", every trial it expands to (trials.expand_block) is checked.
+    """
+    block = cfg.get("block")
+    if not block:
+        return validate_trial(cfg)
+    if not isinstance(block, list) or not all(isinstance(entry, dict) for entry in block):
+        return "Error: 'block' must be a list of per-trial settings."
+    for (i, trial_cfg) in enumerate(trials.expand_block(cfg), start=1):
+        error = validate_trial(trial_cfg)
+        if error:
+            return f"Error: block trial {i}: {error[len('Error: '):]}"
+    return None
+
+
+def _to_int(value):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, str)):
+        return int(value)
+    raise ValueError
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "false", "1", "0", "yes", "no"):
+        return value.strip().lower() in ("true", "1", "yes")
+    raise ValueError
+
+
+def _normalize_rows(rows, name):
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError(f"Error: '{name}' must be a list of rows.")
+    normalized = []
+    for (i, row) in enumerate(rows, start=1):
+        fields = dict(row_model.ROW_DEFAULTS)  # as a row loaded into the GUI gets
+        for field in row_model.ROW_FIELDS:
+            if field not in row:
+                continue
+            value = row[field]
+            default = row_model.ROW_DEFAULTS[field]
+            try:
+                if isinstance(default, bool):
+                    value = _to_bool(value)
+                elif isinstance(default, int):
+                    value = _to_int(value)
+                elif isinstance(value, (dict, list)) or value is None:
+                    raise ValueError
+                else:
+                    value = str(value)
+            except ValueError:
+                if isinstance(default, bool):
+                    kind = "true or false"
+                elif isinstance(default, int):
+                    kind = "a whole number"
+                else:
+                    kind = "text"
+                raise ValueError(f"Error: {name[:-1]} row {i}: '{field}' must be {kind}, not {row[field]!r}.")
+            fields[field] = value
+        normalized.append(fields)
+    return normalized
+
+
+def _normalize_settings(cfg, where=""):
+    cfg = dict(cfg)
+    for key in TEXT_KEYS:
+        if key in cfg:
+            cfg[key] = "" if cfg[key] is None else str(cfg[key])
+    for (key, allow_none) in (("total_items", True), ("trials", False), ("seed", True)):
+        if key not in cfg or (allow_none and cfg[key] in (None, "")):
+            continue
+        try:
+            cfg[key] = _to_int(cfg[key])
+        except ValueError:
+            raise ValueError(f"Error: {where}'{key}' must be a whole number, not {cfg[key]!r}.")
+    for key in ROW_LIST_KEYS:
+        if key in cfg:
+            try:
+                cfg[key] = _normalize_rows(cfg[key], key)
+            except ValueError as e:
+                raise ValueError(f"Error: {where}{str(e)[len('Error: '):]}")
+    return cfg
+
+
+def normalize_configuration(cfg):
+    """
+    Check the types in a configuration read from a file and convert what can
+    be converted; target/distractor rows get row_model.ROW_DEFAULTS for any
+    field they leave out. Returns (config, None), or (None, error message) naming the
+    first bad value. Whether the values make a runnable session is left to
+    validate_configuration().
+    """
+    if not isinstance(cfg, dict):
+        return None, "Error: not a Search Task configuration."
+    try:
+        cfg = _normalize_settings(cfg)
+        block = cfg.get("block")
+        if block:
+            if not isinstance(block, list) or not all(isinstance(entry, dict) for entry in block):
+                return None, "Error: 'block' must be a list of per-trial settings."
+            cfg["block"] = [_normalize_settings(entry, where=f"block trial {i}: ")
+                            for (i, entry) in enumerate(block, start=1)]
+    except ValueError as e:
+        return None, str(e)
+    return cfg, None
+
+
+def validate_trial(cfg):
+    """
+    The checks for one trial's configuration.
+    """
+    if not (str(cfg.get("study_id", "")).strip() and
+            str(cfg.get("session", "")).strip() and
+            str(cfg.get("administrator", "")).strip()):
+        return "Error: Fill out Study ID, Session #, and Administrator."
+    total_val = cfg.get("total_items") or 0
+    if not isinstance(total_val, int) or total_val <= 0:
+        return "Error: 'Number of items total' invalid or blank."
+    t_sum = sum(t.get("quantity", 0) for t in cfg.get("targets", []))
+    d_sum = sum(d.get("quantity", 0) for d in cfg.get("distractors", []))
+    if t_sum + d_sum != total_val:
+        return "Error: sum of target + distractor must equal total items."
+    algorithm = cfg.get("layout_algorithm", placement.LAYOUT_RANDOM)
+    if algorithm not in placement.LAYOUT_ALGORITHMS:
+        return (f"Error: unknown layout algorithm {algorithm!r} "
+                f"(one of {', '.join(placement.LAYOUT_ALGORITHMS)}).")
+    path = cfg.get("layout_file")
+    if path:
+        try:
+            layout_file.read_header(path)
+        except OSError as e:
+            return f"Error: cannot read layout file {path!r} ({e.strerror or e})."
+        except ValueError as e:
+            return f"Error: {e}."
+    return None